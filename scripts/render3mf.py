@@ -7,6 +7,27 @@ with proper color support that OpenSCAD's renderer lacks.
 
 Usage:
     blender --background --python render3mf.py -- <input.3mf> <output_dir> [views...]
+    blender --background --python render3mf.py -- --batch [views...] < jobs.txt
+    blender --background --python render3mf.py -- --serve [views...] < jobs.jsonl
+    
+Batch mode:
+    Reads '<input.3mf> <output_dir>' pairs from stdin, one per line, and renders
+    them all in a single Blender process.
+    
+Serve mode:
+    Reads JSON jobs from stdin, one per line:
+        {"model_path": "...", "output_dir": "...", "views": [...], "quality": "..."}
+    ("views" and "quality" are optional) and writes one JSON result line per
+    job to stdout: {"status": "ok" | "failed" | "error", "views": {...}}.
+    Once the script starts, render logs, including Blender's and Cycles'
+    output, go to stderr. (Blender's startup banner is printed before the
+    script runs, so it still precedes the first result line.)
+    
+Options:
+    --split-per-gpu   Render views in parallel, one Blender process per GPU
+                      (or RENDER_SPLIT_GPUS=1); pays off only for expensive views
+    --quality=high    Light with the area light rig instead of the (faster)
+                      gradient world used for previews (or RENDER_MODE=high)
     
 Views:
     iso, front, back, left, right, top, bottom (default: all)
@@ -19,50 +40,255 @@ import bpy
 import sys
 import os
 import math
+import re
+import array
+import ctypes
+import functools
+import glob
+import hashlib
+import json
+import shlex
+import shutil
+import signal
+import socket
+import struct
 import subprocess
-from mathutils import Vector, Euler
+import tempfile
+import time
+import zlib
+from collections import Counter
+from enum import IntEnum
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+import numpy as np
+from mathutils import Matrix, Vector, Euler
+
+
+# Result of the last detect_gpu_backend() probe, reused for the rest of the session
+_GPU_BACKEND = None
+
+# Name fragments of NVIDIA GPUs with RT cores / OptiX support
+OPTIX_GPU_MARKERS = ('RTX', 'TESLA', 'A100', 'H100')
+
+# Cross-process cache of the detected backend. The pipeline driver can also
+# export FORGE_GPU_BACKEND so child Blender processes skip probing entirely.
+GPU_BACKEND_ENV = 'FORGE_GPU_BACKEND'
+GPU_BACKEND_CACHE = '/tmp/forge_gpu_backend.cache'
+GPU_BACKENDS = ('OPTIX', 'CUDA', 'HIP', 'CPU')
+# A CPU fallback after a failed probe render may be transient (OOM from a
+# concurrent render, a driver hiccup), so it is only trusted this long
+GPU_FALLBACK_CACHE_TTL = 600
+
+# PCI vendor id reported by AMD GPUs in /sys/class/drm/card*/device/vendor
+AMD_PCI_VENDOR_ID = '0x1002'
+
+
+def _nvidia_backend_for(name):
+    """Pick OptiX for RTX-class NVIDIA GPUs, CUDA for everything else."""
+    if any(marker in name.upper() for marker in OPTIX_GPU_MARKERS):
+        print("[GPU] Using OptiX for best performance")
+        return 'OPTIX'
+    print("[GPU] Using CUDA")
+    return 'CUDA'
+
+
+def _nvml_gpu_name():
+    """
+    Query the first NVIDIA GPU through NVML (in-process, no nvidia-smi spawn).
+
+    Returns:
+        str: GPU name, '' if NVML reports no usable GPU, or None if pynvml is missing
+    """
+    try:
+        import pynvml
+    except ImportError:
+        return None
+
+    try:
+        pynvml.nvmlInit()
+        try:
+            if pynvml.nvmlDeviceGetCount() == 0:
+                return ''
+            name = pynvml.nvmlDeviceGetName(pynvml.nvmlDeviceGetHandleByIndex(0))
+        finally:
+            pynvml.nvmlShutdown()
+    except pynvml.NVMLError:
+        # Driver/library not loaded - nvidia-smi would fail the same way
+        return ''
+
+    # Older pynvml releases return bytes
+    if isinstance(name, bytes):
+        name = name.decode('utf-8', 'replace')
+    return name
+
+
+def _kfd_gpu_nodes():
+    """Return the KFD topology nodes that are GPUs (CPU nodes report gpu_id 0)."""
+    nodes = []
+    for gpu_id_path in glob.glob('/sys/class/kfd/kfd/topology/nodes/*/gpu_id'):
+        try:
+            with open(gpu_id_path) as f:
+                if int(f.read().strip() or 0) != 0:
+                    nodes.append(os.path.dirname(gpu_id_path))
+        except (OSError, ValueError):
+            continue
+    return nodes
+
+
+def _has_amd_sysfs():
+    """True if /dev/kfd exists and a DRM card reports the AMD PCI vendor id."""
+    if not os.path.exists('/dev/kfd'):
+        return False
+    for vendor_path in glob.glob('/sys/class/drm/card*/device/vendor'):
+        try:
+            with open(vendor_path) as f:
+                if f.read().strip().lower() == AMD_PCI_VENDOR_ID:
+                    return True
+        except OSError:
+            continue
+    return False
+
+
+def _gpu_cache_key():
+    """
+    Identify the current machine boot and GPU driver for the backend cache.
+
+    The cache is invalidated whenever the host, the boot or the loaded
+    NVIDIA/AMD driver version changes.
+    """
+    parts = [socket.gethostname()]
+    for path in ('/proc/sys/kernel/random/boot_id',
+                 '/proc/driver/nvidia/version',
+                 '/sys/module/amdgpu/version'):
+        try:
+            with open(path) as f:
+                parts.append(f.readline().strip())
+        except OSError:
+            parts.append('')
+    return '|'.join(parts)
+
+
+def _read_gpu_backend_cache(cache_key):
+    """Return the cached backend for cache_key, or None if missing/stale/expired."""
+    try:
+        with open(GPU_BACKEND_CACHE) as f:
+            cached_key, backend, expires = (f.read().split('\n') + [''])[:3]
+        if expires and float(expires) < time.time():
+            return None
+    except (OSError, ValueError):
+        return None
+    if cached_key != cache_key or backend not in GPU_BACKENDS:
+        return None
+    return backend
+
+
+def _write_gpu_backend_cache(cache_key, backend, ttl=None):
+    """
+    Persist the detected backend; failures only cost a re-probe next time.
+
+    With ttl (seconds), the entry is ignored once it is that old.
+    """
+    expires = f"{time.time() + ttl:.0f}" if ttl else ''
+    cache_dir, cache_name = os.path.split(GPU_BACKEND_CACHE)
+    try:
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{cache_name}.", dir=cache_dir)
+    except OSError as e:
+        print(f"[GPU] Could not write backend cache: {e}")
+        return
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(f"{cache_key}\n{backend}\n{expires}\n")
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, GPU_BACKEND_CACHE)
+    except OSError as e:
+        print(f"[GPU] Could not write backend cache: {e}")
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
 
 
 def detect_gpu_backend():
     """
     Detect available GPU and return appropriate Blender Cycles device type.
 
+    Lookup order: FORGE_GPU_BACKEND env var, in-session result, the
+    per-boot cache file, and finally the hardware probes. In-process probes
+    (NVML, sysfs) are tried before spawning nvidia-smi or rocminfo.
+
     Returns:
         str: 'OPTIX', 'CUDA', 'HIP', or 'CPU'
     """
-    # Check for NVIDIA GPU
-    try:
-        # Check if nvidia-smi exists and works
-        result = subprocess.run(['nvidia-smi', '-L'],
-                              capture_output=True,
-                              text=True,
-                              timeout=2)
-        if result.returncode == 0 and 'GPU' in result.stdout:
-            print(f"[GPU] Detected NVIDIA GPU: {result.stdout.strip()}")
-
-            # Check if it's an RTX card (supports OptiX)
-            if 'RTX' in result.stdout.upper() or 'TESLA' in result.stdout.upper():
-                print("[GPU] Using OptiX for best performance")
-                return 'OPTIX'
-            else:
-                print("[GPU] Using CUDA")
-                return 'CUDA'
-    except (FileNotFoundError, subprocess.TimeoutExpired, Exception) as e:
-        pass
+    global _GPU_BACKEND
+
+    env_backend = os.environ.get(GPU_BACKEND_ENV, '').upper()
+    if env_backend in GPU_BACKENDS:
+        print(f"[GPU] Using {env_backend} from {GPU_BACKEND_ENV}")
+        return env_backend
+
+    if _GPU_BACKEND is None:
+        cache_key = _gpu_cache_key()
+        _GPU_BACKEND = _read_gpu_backend_cache(cache_key)
+        if _GPU_BACKEND is not None:
+            print(f"[GPU] Using cached backend: {_GPU_BACKEND}")
+        else:
+            _GPU_BACKEND = _probe_gpu_backend()
+            _write_gpu_backend_cache(cache_key, _GPU_BACKEND)
+
+    # Export for child processes spawned from this one
+    os.environ[GPU_BACKEND_ENV] = _GPU_BACKEND
+    return _GPU_BACKEND
 
-    # Check for AMD GPU
-    try:
-        # Check for ROCm
-        result = subprocess.run(['rocminfo'],
-                              capture_output=True,
-                              text=True,
-                              timeout=2)
-        if result.returncode == 0 and 'Agent' in result.stdout:
-            print(f"[GPU] Detected AMD GPU via ROCm")
-            print("[GPU] Using HIP")
-            return 'HIP'
-    except (FileNotFoundError, subprocess.TimeoutExpired, Exception):
-        pass
+
+def _probe_gpu_backend():
+    """Run the actual GPU probes for detect_gpu_backend()."""
+    # Check for NVIDIA GPU via NVML first
+    nvml_name = _nvml_gpu_name()
+    if nvml_name:
+        print(f"[GPU] Detected NVIDIA GPU: {nvml_name}")
+        return _nvidia_backend_for(nvml_name)
+
+    # pynvml not installed - fall back to nvidia-smi
+    if nvml_name is None:
+        try:
+            # Check if nvidia-smi exists and works
+            result = subprocess.run(['nvidia-smi', '-L'],
+                                  capture_output=True,
+                                  text=True,
+                                  timeout=2)
+            if result.returncode == 0 and 'GPU' in result.stdout:
+                print(f"[GPU] Detected NVIDIA GPU: {result.stdout.strip()}")
+                return _nvidia_backend_for(result.stdout)
+        except (FileNotFoundError, subprocess.TimeoutExpired, Exception) as e:
+            pass
+
+    # Check for AMD GPU via the KFD topology (pure file I/O)
+    kfd_nodes = _kfd_gpu_nodes()
+    if kfd_nodes:
+        print(f"[GPU] Detected AMD GPU via KFD topology: {len(kfd_nodes)} node(s)")
+        print("[GPU] Using HIP")
+        return 'HIP'
+
+    # Check for AMD GPU via /dev/kfd + DRM vendor id (pure file I/O)
+    if _has_amd_sysfs():
+        print("[GPU] Detected AMD GPU via sysfs")
+        print("[GPU] Using HIP")
+        return 'HIP'
+
+    # Check for AMD GPU - rocminfo enumerates agents through /dev/kfd, so
+    # there is no point spawning it when the device node is missing
+    if os.path.exists('/dev/kfd'):
+        try:
+            # Check for ROCm
+            result = subprocess.run(['rocminfo'],
+                                  capture_output=True,
+                                  text=True,
+                                  timeout=2)
+            if result.returncode == 0 and 'Agent' in result.stdout:
+                print(f"[GPU] Detected AMD GPU via ROCm")
+                print("[GPU] Using HIP")
+                return 'HIP'
+        except (FileNotFoundError, subprocess.TimeoutExpired, Exception):
+            pass
 
     # Check for AMD GPU via device files (fallback)
     if os.path.exists('/dev/kfd') and os.path.exists('/dev/dri'):
@@ -77,6 +303,45 @@ def detect_gpu_backend():
     return 'CPU'
 
 
+KERNEL_CACHE_ENV = 'RENDER_KERNEL_CACHE'
+# Driver-side JIT caches: PTX -> SASS for CUDA, compiled pipelines for OptiX
+KERNEL_CACHE_DIRS = {
+    'CUDA_CACHE_PATH': 'cuda',
+    'OPTIX_CACHE_PATH': 'optix',
+}
+# Older CUDA drivers cap the JIT cache at 256 MiB, which JIT-compiled Cycles
+# kernels for several GPUs/versions can outgrow, forcing rebuilds
+CUDA_CACHE_MAXSIZE = 1 << 30
+
+
+def pin_kernel_caches():
+    """
+    Raise the CUDA kernel cache limit and optionally relocate the GPU caches.
+
+    The drivers already keep their JIT caches on disk and share them between
+    processes (~/.nv/ComputeCache, /var/tmp/OptixCache_<user>), so the
+    locations are left alone unless RENDER_KERNEL_CACHE names a directory
+    to use instead, e.g. a volume that outlives the container. Must run
+    before Cycles initializes a device, since the drivers read these
+    variables once at init. Caller provided cache variables are left alone.
+    """
+    os.environ.setdefault('CUDA_CACHE_MAXSIZE', str(CUDA_CACHE_MAXSIZE))
+    root = os.environ.get(KERNEL_CACHE_ENV)
+    if not root:
+        return
+    
+    for env, subdir in KERNEL_CACHE_DIRS.items():
+        if env in os.environ:
+            continue
+        path = os.path.join(root, subdir)
+        try:
+            os.makedirs(path, exist_ok=True)
+        except OSError as e:
+            print(f"[GPU] Cannot create kernel cache {path}: {e}")
+            continue
+        os.environ[env] = path
+
+
 def configure_gpu_device(device_type):
     """
     Configure Blender to use the specified device type.
@@ -124,18 +389,128 @@ def configure_gpu_device(device_type):
         print(f"[GPU] Error configuring GPU: {e}, falling back to CPU")
 
 
-def clear_scene():
-    """Remove all objects from the scene."""
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete(use_global=False)
+def gpu_device_count(device_type):
+    """Return how many Cycles compute devices of device_type are available."""
+    if device_type == 'CPU':
+        return 0
+    try:
+        prefs = bpy.context.preferences.addons['cycles'].preferences
+        return sum(1 for device in prefs.devices if device.type == device_type)
+    except Exception as e:
+        print(f"[GPU] Could not count devices: {e}")
+        return 0
+
+
+PROBE_RESOLUTION = 16
+
+
+def _probe_render(device_type):
+    """
+    Render a tiny throwaway scene on device_type to check that it works.
+
+    A broken GPU setup otherwise only shows up after a model has been
+    imported, and then fails every view in turn.
+
+    Returns:
+        bool: True if the probe frame rendered
+    """
+    probe = bpy.data.scenes.new('_probe')
+    cam_data = bpy.data.cameras.new('_probe')
+    cam_obj = bpy.data.objects.new('_probe', cam_data)
+    try:
+        probe.collection.objects.link(cam_obj)
+        probe.camera = cam_obj
+        probe.render.engine = 'CYCLES'
+        probe.render.resolution_x = PROBE_RESOLUTION
+        probe.render.resolution_y = PROBE_RESOLUTION
+        probe.render.resolution_percentage = 100
+        probe.cycles.device = 'GPU'
+        probe.cycles.samples = 1
+        probe.cycles.use_denoising = False
+        result = bpy.ops.render.render(write_still=False, scene=probe.name)
+        return 'FINISHED' in result
+    except Exception as e:
+        print(f"[GPU] Probe render on {device_type} failed: {e}")
+        return False
+    finally:
+        bpy.data.scenes.remove(probe)
+        bpy.data.objects.remove(cam_obj)
+        bpy.data.cameras.remove(cam_data)
+
+
+def clear_scene(keep_rig=False):
+    """
+    Remove all objects from the scene.
+
+    Objects are removed straight from bpy.data rather than through the
+    select/delete operators, which skips operator context handling and
+    undo bookkeeping.
+
+    Args:
+        keep_rig: Keep cameras and lights so they can be repositioned for the
+            next model instead of being recreated
+    """
+    for obj in list(bpy.context.scene.objects):
+        if keep_rig and obj.type in ('CAMERA', 'LIGHT'):
+            continue
+        bpy.data.objects.remove(obj, do_unlink=True)
+    
+    # Also clear orphan data (meshes first, so their materials become orphans too)
+    for collection in (bpy.data.meshes, bpy.data.materials):
+        orphans = [block for block in collection if block.users == 0]
+        if orphans:
+            bpy.data.batch_remove(ids=orphans)
+
+
+# 3MF core namespace and the element tags the manual importer reacts to
+NS_3MF_CORE = 'http://schemas.microsoft.com/3dmanufacturing/core/2015/02'
+TAG_BASEMATERIALS = f'{{{NS_3MF_CORE}}}basematerials'
+TAG_BASE = f'{{{NS_3MF_CORE}}}base'
+TAG_OBJECT = f'{{{NS_3MF_CORE}}}object'
+TAG_VERTICES = f'{{{NS_3MF_CORE}}}vertices'
+TAG_VERTEX = f'{{{NS_3MF_CORE}}}vertex'
+TAG_TRIANGLES = f'{{{NS_3MF_CORE}}}triangles'
+TAG_TRIANGLE = f'{{{NS_3MF_CORE}}}triangle'
+
+
+MODEL_PROBE_BYTES = 65536
+# Material groups live in <resources>, but can follow objects that don't use
+# them, so only a complete <resources> block without any is conclusive
+PROBE_BASEMATERIALS = b'basematerials'
+PROBE_RESOURCES_END = re.compile(rb'</(?:\w+:)?resources>')
+
+
+def _find_model_file(zf):
+    """Return the name of the model part (usually 3D/3dmodel.model) or None."""
+    for name in zf.namelist():
+        if name.endswith('.model'):
+            return name
+    return None
+
+
+def _probe_3mf_materials(filepath):
+    """
+    Check the head of the model XML for material declarations.
+
+    Returns True if <basematerials> are declared, False if the whole
+    <resources> block fits in the probe without any, and None otherwise.
+    """
+    import zipfile
+    try:
+        with zipfile.ZipFile(filepath, 'r') as zf:
+            model_file = _find_model_file(zf)
+            if not model_file:
+                return None
+            with zf.open(model_file) as f:
+                head = f.read(MODEL_PROBE_BYTES)
+    except (OSError, zipfile.BadZipFile):
+        return None
     
-    # Also clear orphan data
-    for block in bpy.data.meshes:
-        if block.users == 0:
-            bpy.data.meshes.remove(block)
-    for block in bpy.data.materials:
-        if block.users == 0:
-            bpy.data.materials.remove(block)
+    if PROBE_BASEMATERIALS in head:
+        return True
+    if PROBE_RESOURCES_END.search(head):
+        return False
+    return None
 
 
 def import_3mf(filepath):
@@ -144,317 +519,492 @@ def import_3mf(filepath):
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"3MF file not found: {filepath}")
     
+    # The native importer drops base materials, so don't let it parse the
+    # whole file first when the archive already declares them
+    declares_materials = _probe_3mf_materials(filepath)
+    if declares_materials:
+        print("3MF declares base materials, using manual 3MF importer...")
+        import_3mf_manual(filepath)
+        return True
+    
     # Try importing as 3MF (Blender 2.82+ has experimental support)
     # If 3MF import fails, we can try to extract and import the mesh
     try:
         # Blender 2.83+ has native 3MF support
         # NOTE: Native importer might miss materials or not handle alpha correctly
-        # We will try native first, then check if we need to fix materials
         bpy.ops.import_mesh.threemf(filepath=filepath)
         
-        # Check if we got any materials. If not, or if they are "invisible", we might need to fix them
-        has_materials = False
-        for obj in bpy.context.scene.objects:
-            if obj.type == 'MESH' and len(obj.data.materials) > 0:
-                has_materials = True
-                break
-        
-        if not has_materials:
-            print("Native import resulted in no materials. Trying manual import...")
-            raise AttributeError("Force manual import") # Trigger fallback
+        # Only second-guess the result when the probe couldn't tell whether
+        # the file has materials at all
+        if declares_materials is None:
+            has_materials = False
+            for obj in bpy.context.scene.objects:
+                if obj.type == 'MESH' and len(obj.data.materials) > 0:
+                    has_materials = True
+                    break
+            
+            if not has_materials:
+                print("Native import resulted in no materials. Trying manual import...")
+                raise AttributeError("Force manual import") # Trigger fallback
             
     except (AttributeError, RuntimeError):
         # Fallback: 3MF is a ZIP file containing model.xml with mesh data
         # For older Blender versions, we need a different approach
-        import zipfile
-        import tempfile
+        print("Using manual 3MF importer...")
+        import_3mf_manual(filepath)
+    
+    return True
+
+
+def import_3mf_manual(filepath):
+    """
+    Import the mesh and base-material data of a 3MF file without an addon.
+
+    The model XML is streamed with iterparse and elements are cleared as soon
+    as they are consumed, so peak memory is bounded by one object's geometry
+    instead of the whole document tree.
+    """
+    import zipfile
+    # lxml is opt-in: Blender doesn't bundle it, and on the flat
+    # vertex/triangle streams of a 3MF file the stdlib parser is no slower
+    ET = None
+    if os.environ.get('RENDER_XML_PARSER', '').lower() == 'lxml':
+        try:
+            from lxml import etree as ET
+        except ImportError:
+            print("RENDER_XML_PARSER=lxml but lxml is not installed, using stdlib parser")
+    if ET is None:
         import xml.etree.ElementTree as ET
+
+    with zipfile.ZipFile(filepath, 'r') as zf:
+        model_file = _find_model_file(zf)
+        if not model_file:
+            raise ValueError("No .model file found in 3MF archive")
         
-        print("Using manual 3MF importer...")
+        # Map (group_id, base_index) -> blender_material
+        # 3MF refers to materials by (pid, p1) where pid=group_id, p1=index_in_group
+        materials_map = {}
+        group_id = None
+        group_idx = 0
         
-        with zipfile.ZipFile(filepath, 'r') as zf:
-            # Find the model file (usually 3D/3dmodel.model)
-            model_file = None
-            for name in zf.namelist():
-                if name.endswith('.model'):
-                    model_file = name
-                    break
-            
-            if not model_file:
-                raise ValueError("No .model file found in 3MF archive")
-            
-            # Parse the model XML
-            with zf.open(model_file) as f:
-                tree = ET.parse(f)
-                root = tree.getroot()
+        # Per-object state, reset on every <object>
+        obj_pid = obj_p1 = None
+        default_mat = None
+        coords = []   # Flat x, y, z attribute strings
+        tri_verts = [] # Flat v1, v2, v3 attribute strings
+        face_materials = array.array('i') # Material slot index per face
+        used_materials = [] # Unique materials used in this mesh, in slot order
+        mat_slot = {}       # id(material) -> slot index in used_materials
+        
+        # Container whose consumed children are released as they are parsed
+        container = None
+        
+        with zf.open(model_file) as f:
+            for event, elem in ET.iterparse(f, events=('start', 'end')):
+                tag = elem.tag
                 
-                # Extract namespace
-                ns = {'m': 'http://schemas.microsoft.com/3dmanufacturing/core/2015/02'}
+                if event == 'start':
+                    # Attributes are already available on start events
+                    if tag == TAG_OBJECT:
+                        obj_pid = elem.get('pid') # Default property ID for the object
+                        obj_p1 = elem.get('p1')   # Default property index
+                        # Material for triangles without their own pid/p1
+                        default_mat = materials_map.get((obj_pid, obj_p1)) if obj_pid and obj_p1 else None
+                        coords = []
+                        tri_verts = []
+                        face_materials = array.array('i')
+                        used_materials = []
+                        mat_slot = {}
+                    elif tag in (TAG_VERTICES, TAG_TRIANGLES, TAG_BASEMATERIALS):
+                        container = elem
+                        if tag == TAG_BASEMATERIALS:
+                            group_id = elem.get('id')
+                            group_idx = 0
+                    continue
                 
-                # 1. Parse Materials (BaseMaterials)
-                # Map id -> blender_material
-                materials_map = {}
+                if tag == TAG_VERTEX:
+                    # x/y/z are required attributes in the 3MF core spec;
+                    # keep them as strings and convert the whole mesh at once
+                    attrib = elem.attrib
+                    coords.extend((attrib['x'], attrib['y'], attrib['z']))
+                    _release_element(elem, container)
                 
-                # Find all resources/basematerials
-                resources = root.find('m:resources', ns)
-                if resources is not None:
-                    for basemat_group in resources.findall('.//m:basematerials', ns):
-                        group_id = basemat_group.get('id')
-                        for base in basemat_group.findall('m:base', ns):
-                            base_name = base.get('name', 'Material')
-                            display_color = base.get('displaycolor', '#FFFFFF')
-                            
-                            # Parse Hex Color #RRGGBBAA or #RRGGBB
-                            if display_color.startswith('#'):
-                                hex_col = display_color[1:]
-                                if len(hex_col) == 6:
-                                    r = int(hex_col[0:2], 16) / 255.0
-                                    g = int(hex_col[2:4], 16) / 255.0
-                                    b = int(hex_col[4:6], 16) / 255.0
-                                    a = 1.0
-                                elif len(hex_col) == 8:
-                                    r = int(hex_col[0:2], 16) / 255.0
-                                    g = int(hex_col[2:4], 16) / 255.0
-                                    b = int(hex_col[4:6], 16) / 255.0
-                                    a = int(hex_col[6:8], 16) / 255.0
-                                else:
-                                    r, g, b, a = 0.8, 0.8, 0.8, 1.0
-                            else:
-                                r, g, b, a = 0.8, 0.8, 0.8, 1.0
-                            
-                            # CRITICAL FIX: If alpha is 0 but color is present, assume it should be opaque
-                            # Many 3MF exporters write #RRGGBB00 by mistake or for specific purposes
-                            if a < 0.01:
-                                print(f"Fixing invisible material '{base_name}' (alpha=0 -> 1.0)")
-                                a = 1.0
-                                
-                            # Create Blender Material
-                            mat = bpy.data.materials.new(name=base_name)
-                            mat.use_nodes = True
-                            bsdf = mat.node_tree.nodes.get("Principled BSDF")
-                            if bsdf:
-                                bsdf.inputs['Base Color'].default_value = (r, g, b, a)
-                                bsdf.inputs['Roughness'].default_value = 0.5
-                                bsdf.inputs['Metallic'].default_value = 0.1
-                            
-                            # Store in map: (group_id, base_index) -> material
-                            # 3MF refers to materials by (pid, p1) where pid=group_id, p1=index_in_group
-                            # We can't easily get index without counter, so let's re-iterate or use list
-                            pass 
-
-                    # Re-iterate to build map with correct indices
-                    for basemat_group in resources.findall('.//m:basematerials', ns):
-                        group_id = basemat_group.get('id')
-                        for idx, base in enumerate(basemat_group.findall('m:base', ns)):
-                            base_name = base.get('name', f'Material_{group_id}_{idx}')
-                            # Find the material we just created (by name) or create new if name collision
-                            mat = bpy.data.materials.get(base_name)
-                            if not mat:
-                                # Fallback re-creation if needed (unlikely)
-                                mat = bpy.data.materials.new(name=base_name)
-                            
-                            materials_map[(group_id, str(idx))] = mat
-
-                # 2. Parse Objects and Meshes
-                for obj in root.findall('.//m:object', ns):
-                    obj_pid = obj.get('pid') # Default property ID for the object
-                    obj_p1 = obj.get('p1')   # Default property index
-                    
-                    mesh_elem = obj.find('.//m:mesh', ns)
-                    if mesh_elem is None:
-                        continue
-                    
-                    vertices_elem = mesh_elem.find('m:vertices', ns)
-                    triangles_elem = mesh_elem.find('m:triangles', ns)
-                    
-                    if vertices_elem is None or triangles_elem is None:
-                        continue
-                    
-                    # Parse vertices
-                    vertices = []
-                    for v in vertices_elem.findall('m:vertex', ns):
-                        x = float(v.get('x', 0))
-                        y = float(v.get('y', 0))
-                        z = float(v.get('z', 0))
-                        vertices.append((x, y, z))
-                    
-                    # Parse triangles and materials
-                    faces = []
-                    face_materials = [] # List of material indices per face
-                    
-                    # Track unique materials used in this mesh to assign to object slots
-                    used_materials = [] 
-                    
-                    for t in triangles_elem.findall('m:triangle', ns):
-                        v1 = int(t.get('v1', 0))
-                        v2 = int(t.get('v2', 0))
-                        v3 = int(t.get('v3', 0))
-                        faces.append((v1, v2, v3))
-                        
-                        # Determine material for this face
-                        # Priority: Triangle attributes > Object attributes
-                        pid = t.get('pid', obj_pid)
-                        p1 = t.get('p1', obj_p1)
-                        
-                        mat = None
-                        if pid and p1:
-                            mat = materials_map.get((pid, p1))
-                        
-                        if mat:
-                            if mat not in used_materials:
-                                used_materials.append(mat)
-                            face_materials.append(used_materials.index(mat))
-                        else:
-                            face_materials.append(0) # Default/None
-                    
-                    # Create mesh in Blender
-                    mesh = bpy.data.meshes.new("imported_mesh")
-                    mesh.from_pydata(vertices, [], faces)
-                    
-                    # Assign materials to mesh
-                    for mat in used_materials:
-                        mesh.materials.append(mat)
-                    
-                    # Assign material indices to faces
-                    if face_materials and used_materials:
-                        mesh.update() # Ensure polygons are ready
-                        # Validate count
-                        if len(mesh.polygons) == len(face_materials):
-                            for i, poly in enumerate(mesh.polygons):
-                                poly.material_index = face_materials[i]
+                elif tag == TAG_TRIANGLE:
+                    attrib = elem.attrib
+                    tri_verts.extend((attrib['v1'], attrib['v2'], attrib['v3']))
                     
-                    mesh.update()
+                    # Determine material for this face
+                    # Priority: Triangle attributes > Object attributes
+                    tri_pid = attrib.get('pid')
+                    tri_p1 = attrib.get('p1')
+                    if tri_pid is None and tri_p1 is None:
+                        # Common case: inherit the object default, no key to build
+                        mat = default_mat
+                    else:
+                        pid = obj_pid if tri_pid is None else tri_pid
+                        p1 = obj_p1 if tri_p1 is None else tri_p1
+                        mat = materials_map.get((pid, p1)) if pid and p1 else None
                     
-                    obj_blender = bpy.data.objects.new("imported_object", mesh)
-                    bpy.context.collection.objects.link(obj_blender)
+                    if mat:
+                        slot = mat_slot.get(id(mat))
+                        if slot is None:
+                            slot = len(used_materials)
+                            mat_slot[id(mat)] = slot
+                            used_materials.append(mat)
+                        face_materials.append(slot)
+                    else:
+                        face_materials.append(0) # Default/None
+                    _release_element(elem, container)
+                
+                elif tag == TAG_BASE:
+                    materials_map[(group_id, str(group_idx))] = _create_base_material(elem, group_id, group_idx)
+                    group_idx += 1
+                    _release_element(elem, container)
+                
+                elif tag == TAG_OBJECT:
+                    if coords and tri_verts:
+                        _create_mesh_object(coords, tri_verts, face_materials, used_materials)
+                    # Release the consumed mesh subtree
+                    elem.clear()
     
     return True
 
 
-def setup_camera_for_view(view_name, bounds_center, bounds_size, max_dim=None):
+def _parse_display_color(display_color):
+    """Parse a 3MF #RRGGBB / #RRGGBBAA color into RGBA floats (gray if malformed)."""
+    try:
+        raw = bytes.fromhex(display_color[1:]) if display_color.startswith('#') else b''
+    except ValueError:
+        raw = b''
+    
+    if len(raw) == 3:
+        return raw[0] / 255.0, raw[1] / 255.0, raw[2] / 255.0, 1.0
+    if len(raw) == 4:
+        return raw[0] / 255.0, raw[1] / 255.0, raw[2] / 255.0, raw[3] / 255.0
+    return 0.8, 0.8, 0.8, 1.0
+
+
+def _release_element(elem, parent):
+    """Free a consumed element and its previous siblings while streaming.
+
+    The element itself is only cleared, not detached: lxml must not have the
+    node it just finished parsing removed from under it.
+    """
+    elem.clear()
+    del parent[:-1]
+
+
+def _create_base_material(base, group_id, idx):
+    """Create a Blender material from a 3MF <base> element."""
+    base_name = base.get('name', f'Material_{group_id}_{idx}')
+    display_color = base.get('displaycolor', '#FFFFFF')
+    
+    r, g, b, a = _parse_display_color(display_color)
+    
+    # CRITICAL FIX: If alpha is 0 but color is present, assume it should be opaque
+    # Many 3MF exporters write #RRGGBB00 by mistake or for specific purposes
+    if a < 0.01:
+        print(f"Fixing invisible material '{base_name}' (alpha=0 -> 1.0)")
+        a = 1.0
+        
+    # Create Blender Material
+    mat = bpy.data.materials.new(name=base_name)
+    mat.use_nodes = True
+    bsdf = mat.node_tree.nodes.get("Principled BSDF")
+    if bsdf:
+        bsdf.inputs['Base Color'].default_value = (r, g, b, a)
+        bsdf.inputs['Roughness'].default_value = 0.5
+        bsdf.inputs['Metallic'].default_value = 0.1
+    
+    return mat
+
+
+def _create_mesh_object(coords, tri_verts, face_materials, used_materials):
     """
-    Set up camera for a specific view.
-    Uses Blender's standard view directions with optimal framing.
+    Create and link a Blender mesh object from parsed 3MF geometry.
+
+    coords and tri_verts are flat sequences (x, y, z... / v1, v2, v3...).
+    They are converted to contiguous arrays once and pushed into the mesh
+    with foreach_set, which copies the buffers in C instead of walking
+    Python tuples like from_pydata does.
     """
-    # Calculate distance based on model size - use larger distance for better feature visibility
-    if max_dim is None:
-        max_dim = max(bounds_size)
-    distance = max_dim * 3.0  # Increased from 2.5 for better overview
+    co = np.array(coords, dtype=np.float32)
+    loop_verts = np.array(tri_verts, dtype=np.int32)
+    n_tris = len(loop_verts) // 3
     
-    # Create camera if it doesn't exist
-    if 'RenderCamera' not in bpy.data.cameras:
-        cam_data = bpy.data.cameras.new('RenderCamera')
-        cam_obj = bpy.data.objects.new('RenderCamera', cam_data)
-        bpy.context.collection.objects.link(cam_obj)
-    else:
-        cam_obj = bpy.data.objects['RenderCamera']
-    
-    # Set camera as active
-    bpy.context.scene.camera = cam_obj
-    
-    # View directions - optimized for feature visibility
-    # Slightly angled views show depth better than pure orthogonal
-    view_configs = {
-        'iso': {
-            'location_offset': Vector((1, 1, 1)),
-            'track_to_target': True
-        },
-        'front': {
-            'location_offset': Vector((0, -1, 0)),
-            'track_to_target': True
-        },
-        'back': {
-            'location_offset': Vector((0, 1, 0)),
-            'track_to_target': True
-        },
-        'left': {
-            'location_offset': Vector((-1, 0, 0)),
-            'track_to_target': True
-        },
-        'right': {
-            'location_offset': Vector((1, 0, 0)),
-            'track_to_target': True
-        },
-        'top': {
-            'location_offset': Vector((0, 0, 1)),
-            'track_to_target': True
-        },
-        'bottom': {
-            'location_offset': Vector((0, 0, -1)),
-            'track_to_target': True
-        }
-    }
+    mesh = bpy.data.meshes.new("imported_mesh")
+    mesh.vertices.add(len(co) // 3)
+    mesh.vertices.foreach_set('co', co)
+    mesh.loops.add(n_tris * 3)
+    mesh.loops.foreach_set('vertex_index', loop_verts)
+    mesh.polygons.add(n_tris)
+    mesh.polygons.foreach_set('loop_start', np.arange(0, n_tris * 3, 3, dtype=np.int32))
+    # Newer Blender derives loop_total from loop_start and makes it read-only
+    if not bpy.types.MeshPolygon.bl_rna.properties['loop_total'].is_readonly:
+        mesh.polygons.foreach_set('loop_total', np.full(n_tris, 3, dtype=np.int32))
     
-    config = view_configs.get(view_name, view_configs['iso'])
+    # Assign materials to mesh
+    for mat in used_materials:
+        mesh.materials.append(mat)
     
-    # Set camera location
-    offset = config['location_offset'].normalized() * distance
-    cam_obj.location = Vector(bounds_center) + offset
+    # Assign material indices to faces
+    if face_materials and used_materials:
+        # Validate count
+        if len(mesh.polygons) == len(face_materials):
+            mesh.polygons.foreach_set('material_index', face_materials)
+    
+    mesh.update(calc_edges=True)
+    
+    obj_blender = bpy.data.objects.new("imported_object", mesh)
+    bpy.context.collection.objects.link(obj_blender)
+    return obj_blender
+
+
+class View(IntEnum):
+    """Standard views; values index _VIEW_SPEC and the VIEW_* tables below."""
+    ISO = 0
+    FRONT = 1
+    BACK = 2
+    LEFT = 3
+    RIGHT = 4
+    TOP = 5
+    BOTTOM = 6
+
+    @property
+    def label(self):
+        """Name used on the command line, in file names and in results."""
+        return self.name.lower()
+
+    def __str__(self):
+        return self.label
+
+    def __format__(self, spec):
+        return format(self.label, spec)
+
+
+# CLI strings are mapped to View members once, in parse_views()
+VIEW_BY_NAME = {view.label: view for view in View}
+
+# View directions (camera offset from the model center) - optimized for feature visibility
+# Slightly angled views show depth better than pure orthogonal
+VIEW_OFFSETS = np.array([
+    (1, 1, 1),    # iso
+    (0, -1, 0),   # front
+    (0, 1, 0),    # back
+    (-1, 0, 0),   # left
+    (1, 0, 0),    # right
+    (0, 0, 1),    # top
+    (0, 0, -1),   # bottom
+], dtype=np.float64)
+VIEW_OFFSETS /= np.linalg.norm(VIEW_OFFSETS, axis=1, keepdims=True)
+
+# The camera always looks back at the model center, so its rotation only
+# depends on the view direction and can be computed once at import time
+VIEW_ROTATIONS = tuple(
+    Vector((-offset).tolist()).to_track_quat('-Z', 'Y').to_euler() for offset in VIEW_OFFSETS
+)
+# Camera distance from the model center, in units of max_dim (increased from
+# 2.5 for better overview)
+CAMERA_DISTANCE = 3.0
+
+# Same rotations as 3x3 arrays; columns are the camera right/up/back axes
+VIEW_BASES = np.array([rotation.to_matrix() for rotation in VIEW_ROTATIONS], dtype=np.float64)
+
+# Per-view dispatch table indexed by View: (unit camera offset, camera basis)
+_VIEW_SPEC = tuple(zip(VIEW_OFFSETS, VIEW_BASES))
+
+# Studio light rig: name, energy, size (x max_dim), offset from center (x light distance)
+LIGHT_RIG = (
+    ("KeyLight", 300, 2, (0.8, -0.8, 1.0)),    # Main, from upper-front-right - strongest
+    ("FillLight", 150, 3, (-0.6, -0.6, 0.5)),  # Upper-front-left - softer, fills shadows
+    ("RimLight", 200, 2, (0.0, 0.8, 0.8)),     # Behind-above - highlights edges
+    ("BottomFill", 50, 4, (0.0, 0.0, -0.5)),   # Very soft - prevents pure black bottoms
+)
+LIGHT_OFFSETS = np.array([light[3] for light in LIGHT_RIG], dtype=np.float64)
+
+# Key/fill/rim track the model center; the bottom fill keeps a fixed orientation
+LIGHT_ROTATIONS = tuple(
+    Vector((-offset).tolist()).to_track_quat('-Z', 'Y').to_euler() for offset in LIGHT_OFFSETS[:3]
+) + (Euler((math.radians(90), 0, 0), 'XYZ'),)
+
+
+def _setup_camera_data(max_dim):
+    """
+    Create (or reuse) the camera data shared by every view camera.
+
+    Projection and clipping only depend on the model size, so all view
+    cameras share one camera datablock that is updated once per model.
+    """
+    distance = max_dim * CAMERA_DISTANCE
     
-    # Point camera at center
-    direction = Vector(bounds_center) - cam_obj.location
-    rot_quat = direction.to_track_quat('-Z', 'Y')
-    cam_obj.rotation_euler = rot_quat.to_euler()
+    cam_data = bpy.data.cameras.get('RenderCamera')
+    if cam_data is None:
+        cam_data = bpy.data.cameras.new('RenderCamera')
     
     # Use orthographic projection for all views (consistent style)
-    cam_obj.data.type = 'ORTHO'
-    cam_obj.data.ortho_scale = max_dim * 1.8  # Add padding around model
+    cam_data.type = 'ORTHO'
+    cam_data.ortho_scale = max_dim * 1.8  # Add padding around model
     
     # Ensure clipping planes encompass large assemblies (prevents empty renders)
-    cam_obj.data.clip_start = 0.1
-    cam_obj.data.clip_end = max(distance * 2.0, max_dim * 5.0)
+    cam_data.clip_start = 0.1
+    cam_data.clip_end = max(distance * 2.0, max_dim * 5.0)
+    
+    return cam_data
+
+
+def view_camera_matrices(views, bounds_center, max_dim):
+    """
+    Compute the camera world matrix of every requested view for one model.
+
+    The camera sits CAMERA_DISTANCE x max_dim out along the view direction, looking
+    back at the center with the precomputed view rotation.
+
+    Returns:
+        dict: View -> mathutils.Matrix
+    """
+    distance = max_dim * CAMERA_DISTANCE
+    center = np.asarray(bounds_center, dtype=np.float64)
+    
+    view_cache = {}
+    for view in views:
+        offset, basis = _VIEW_SPEC[view]
+        matrix = np.identity(4)
+        matrix[:3, :3] = basis
+        matrix[:3, 3] = center + offset * distance
+        view_cache[view] = Matrix(matrix.tolist())
+    return view_cache
+
+
+def setup_view_cameras(view_cache, max_dim):
+    """
+    Create (or reuse) one camera per view, each placed for its view.
+
+    All transforms come precomputed from view_camera_matrices(), so
+    switching views between renders is a single scene.camera assignment.
+
+    Returns:
+        dict: View -> camera object
+    """
+    cam_data = _setup_camera_data(max_dim)
     
-    return cam_obj
+    cameras = {}
+    for view, matrix in view_cache.items():
+        # Cameras are kept alive between batch models
+        name = f'RenderCamera_{view.label}'
+        cam_obj = bpy.data.objects.get(name)
+        if cam_obj is None or cam_obj.type != 'CAMERA':
+            cam_obj = bpy.data.objects.new(name, cam_data)
+        cam_obj.data = cam_data
+        if cam_obj.name not in bpy.context.scene.objects:
+            bpy.context.collection.objects.link(cam_obj)
+        cam_obj.matrix_world = matrix
+        cameras[view] = cam_obj
+    
+    return cameras
+
 
+def _get_or_create_light(name, energy, size):
+    """Return the named area light, creating it on first use."""
+    light = bpy.data.objects.get(name)
+    if light is None or light.type != 'LIGHT':
+        light_data = bpy.data.lights.new(name, type='AREA')
+        light = bpy.data.objects.new(name=name, object_data=light_data)
+    if light.name not in bpy.context.scene.objects:
+        bpy.context.collection.objects.link(light)
+    light.data.energy = energy
+    light.data.size = size
+    return light
 
-def setup_lighting(bounds_center, max_dim):
-    """Set up three-point lighting for optimal feature visibility."""
-    # Remove existing lights
-    for obj in bpy.data.objects:
-        if obj.type == 'LIGHT':
+
+def setup_lighting(bounds_center, max_dim, quality='preview'):
+    """
+    Set up lighting for optimal feature visibility.
+
+    'high' quality uses the three-point area light rig; lights are reused
+    across calls and only resized/repositioned. 'preview' lights the model
+    from a sky/ground gradient world instead, which Cycles samples with a
+    single MIS light sample rather than one per area light, and approximates
+    indirect light with Fast GI.
+    """
+    rig = {light[0] for light in LIGHT_RIG} if quality == 'high' else set()
+    
+    # Remove any other lights (e.g. from the startup scene)
+    for obj in list(bpy.data.objects):
+        if obj.type == 'LIGHT' and obj.name not in rig:
             bpy.data.objects.remove(obj)
     
-    cx, cy, cz = bounds_center.x, bounds_center.y, bounds_center.z
+    preview = quality != 'high'
+    setup_world(gradient=preview)
+    
+    # Fast GI replaces indirect light after the first bounce with AO, which
+    # the soft gradient world lighting can't tell apart from full GI
+    scene = bpy.context.scene
+    _set_if_supported(scene.cycles, 'use_fast_gi', preview)
+    if preview:
+        _set_if_supported(scene.cycles, 'ao_bounces_render', 1)
+        return
+    
     d = max_dim * 2.5  # Light distance
+    locations = np.asarray(bounds_center, dtype=np.float64) + LIGHT_OFFSETS * d
+    
+    for (name, energy, size, _), location, rotation in zip(LIGHT_RIG, locations, LIGHT_ROTATIONS):
+        light = _get_or_create_light(name, energy=energy, size=max_dim * size)
+        light.location = location.tolist()
+        light.rotation_euler = rotation
+
+
+WORLD_COLOR = (0.95, 0.95, 0.97, 1.0)  # Light gray
+WORLD_GROUND_COLOR = (0.3, 0.3, 0.32, 1.0)
+WORLD_GRADIENT_STRENGTH = 1.5
+
+
+def setup_world(gradient=False):
+    """
+    Set up the world background, which also lights the model.
+
+    The background itself is hidden by the transparent film. With gradient,
+    the world fades from WORLD_GROUND_COLOR below the model to WORLD_COLOR
+    above it (a synthetic studio environment, no image to load); otherwise
+    it is a flat WORLD_COLOR fill for the area light rig.
+    """
+    scene = bpy.context.scene
+    if scene.world is None:
+        scene.world = bpy.data.worlds.new("World")
+    world = scene.world
+    world.use_nodes = True
+    _set_if_supported(world.cycles, 'sampling_method', 'AUTOMATIC')
     
-    # Key light (main, from upper-front-right) - strongest
-    key_data = bpy.data.lights.new("KeyLight", type='AREA')
-    key_data.energy = 300  # Strong main light
-    key_data.size = max_dim * 2
-    key = bpy.data.objects.new(name="KeyLight", object_data=key_data)
-    bpy.context.collection.objects.link(key)
-    key.location = (cx + d * 0.8, cy - d * 0.8, cz + d * 1.0)
-    direction = Vector(bounds_center) - key.location
-    key.rotation_euler = direction.to_track_quat('-Z', 'Y').to_euler()
-    
-    # Fill light (from upper-front-left) - softer, fills shadows
-    fill_data = bpy.data.lights.new("FillLight", type='AREA')
-    fill_data.energy = 150  # Softer fill
-    fill_data.size = max_dim * 3
-    fill = bpy.data.objects.new(name="FillLight", object_data=fill_data)
-    bpy.context.collection.objects.link(fill)
-    fill.location = (cx - d * 0.6, cy - d * 0.6, cz + d * 0.5)
-    direction = Vector(bounds_center) - fill.location
-    fill.rotation_euler = direction.to_track_quat('-Z', 'Y').to_euler()
-    
-    # Rim/back light (from behind-above) - highlights edges
-    rim_data = bpy.data.lights.new("RimLight", type='AREA')
-    rim_data.energy = 200  # Strong rim for edge definition
-    rim_data.size = max_dim * 2
-    rim = bpy.data.objects.new(name="RimLight", object_data=rim_data)
-    bpy.context.collection.objects.link(rim)
-    rim.location = (cx, cy + d * 0.8, cz + d * 0.8)
-    direction = Vector(bounds_center) - rim.location
-    rim.rotation_euler = direction.to_track_quat('-Z', 'Y').to_euler()
-    
-    # Bottom fill (prevents pure black bottoms)
-    bottom_data = bpy.data.lights.new("BottomFill", type='AREA')
-    bottom_data.energy = 50  # Very soft
-    bottom_data.size = max_dim * 4
-    bottom = bpy.data.objects.new(name="BottomFill", object_data=bottom_data)
-    bpy.context.collection.objects.link(bottom)
-    bottom.location = (cx, cy, cz - d * 0.5)
-    bottom.rotation_euler = Euler((math.radians(90), 0, 0), 'XYZ')
+    tree = world.node_tree
+    bg_node = tree.nodes.get('Background')
+    if bg_node is None:
+        return
+    color_input = bg_node.inputs['Color']
+    
+    if not gradient:
+        for link in list(color_input.links):
+            tree.links.remove(link)
+        color_input.default_value = WORLD_COLOR
+        bg_node.inputs['Strength'].default_value = 1.0
+        return
+    
+    # Generated coordinates of the world are the view direction; map its Z
+    # from [-1, 1] to [0, 1] and shade ground -> sky along it
+    coord, _ = _get_or_create_node(tree, 'ShaderNodeTexCoord', 'Sky Coord')
+    height, _ = _get_or_create_node(tree, 'ShaderNodeSeparateXYZ', 'Sky Height')
+    remap, _ = _get_or_create_node(tree, 'ShaderNodeMath', 'Sky Remap')
+    remap.operation = 'MULTIPLY_ADD'
+    remap.inputs[1].default_value = 0.5
+    remap.inputs[2].default_value = 0.5
+    ramp, created = _get_or_create_node(tree, 'ShaderNodeValToRGB', 'Sky Ramp')
+    if created:
+        ramp.color_ramp.elements[0].color = WORLD_GROUND_COLOR
+        ramp.color_ramp.elements[1].color = WORLD_COLOR
+    
+    tree.links.new(coord.outputs['Generated'], height.inputs[0])
+    tree.links.new(height.outputs['Z'], remap.inputs[0])
+    tree.links.new(remap.outputs[0], ramp.inputs['Fac'])
+    tree.links.new(ramp.outputs['Color'], color_input)
+    bg_node.inputs['Strength'].default_value = WORLD_GRADIENT_STRENGTH
 
 
 def setup_materials():
@@ -481,100 +1031,177 @@ def setup_materials():
                 obj.data.materials.append(mat)
             
             # Ensure smooth shading for better 3D appearance
-            for poly in obj.data.polygons:
-                poly.use_smooth = True
+            polygons = obj.data.polygons
+            polygons.foreach_set('use_smooth', np.ones(len(polygons), dtype=bool))
             obj.data.use_auto_smooth = True
             obj.data.auto_smooth_angle = math.radians(40)
 
 
+# Above this many vertices an object's 8 bound_box corners are used instead
+# of copying every vertex (slightly looser box for rotated objects)
+BOUNDS_VERTEX_LIMIT = 2_000_000
+
+
+def _to_world(obj, co):
+    """Transform an (N, 3) array of local coordinates by the object's world matrix."""
+    matrix = np.array(obj.matrix_world, dtype=np.float64)
+    return co @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def _mesh_world_coords(obj, elements='vertices', attr='co'):
+    """
+    Return a per-element vector attribute of a mesh in world space.
+
+    The attribute is read in one foreach_get call into a flat float32 buffer
+    (no per-element Python objects) and transformed with a single matrix
+    product.
+
+    Returns:
+        numpy.ndarray: (N, 3) float64 array, e.g. vertex positions or
+            (elements='polygons', attr='center') face centers
+    """
+    collection = getattr(obj.data, elements)
+    co = np.empty(len(collection) * 3, dtype=np.float32)
+    collection.foreach_get(attr, co)
+    return _to_world(obj, co.reshape(-1, 3))
+
+
+def _object_world_bounds(obj):
+    """Return world-space (min, max) corners of a mesh object as NumPy arrays."""
+    n = len(obj.data.vertices)
+    if n == 0 or n > BOUNDS_VERTEX_LIMIT:
+        world = _to_world(obj, np.array(obj.bound_box, dtype=np.float64))  # 8 corners
+    else:
+        world = _mesh_world_coords(obj)
+    return world.min(axis=0), world.max(axis=0)
+
+
 def get_scene_bounds():
     """Calculate bounding box of all mesh objects in scene."""
-    min_coord = Vector((float('inf'), float('inf'), float('inf')))
-    max_coord = Vector((float('-inf'), float('-inf'), float('-inf')))
-    
+    mins = []
+    maxs = []
     for obj in bpy.context.scene.objects:
         if obj.type == 'MESH':
-            # Get world-space bounding box
-            for corner in obj.bound_box:
-                world_corner = obj.matrix_world @ Vector(corner)
-                min_coord.x = min(min_coord.x, world_corner.x)
-                min_coord.y = min(min_coord.y, world_corner.y)
-                min_coord.z = min(min_coord.z, world_corner.z)
-                max_coord.x = max(max_coord.x, world_corner.x)
-                max_coord.y = max(max_coord.y, world_corner.y)
-                max_coord.z = max(max_coord.z, world_corner.z)
-    
-    if min_coord.x == float('inf'):
+            obj_min, obj_max = _object_world_bounds(obj)
+            mins.append(obj_min)
+            maxs.append(obj_max)
+    
+    if not mins:
         # No objects found, return defaults
         return Vector((0, 0, 0)), Vector((1, 1, 1))
     
-    center = (min_coord + max_coord) / 2
-    size = max_coord - min_coord
+    min_coord = np.minimum.reduce(mins)
+    max_coord = np.maximum.reduce(maxs)
+    
+    center = Vector(((min_coord + max_coord) / 2).tolist())
+    size = Vector((max_coord - min_coord).tolist())
     
     return center, size
 
 
-def setup_render_settings(width=800, height=800, max_dim=1.0, device_type='CPU'):
-    """Configure render settings for optimal feature visibility.
+# Projected points are snapped to 1/VIEW_HASH_QUANT of the model size, so
+# float noise between symmetric views doesn't defeat the hash
+VIEW_HASH_QUANT = 1024
 
-    Uses Cycles renderer with Freestyle for edge rendering.
-    EEVEE doesn't support Freestyle in Blender 2.82, and Workbench
-    crashes in headless/WSL environments (needs OpenGL).
 
-    Args:
-        width: Render width in pixels
-        height: Render height in pixels
-        max_dim: Maximum dimension of the model
-        device_type: 'CPU', 'CUDA', 'OPTIX', or 'HIP'
+def view_hash_geometry():
     """
-    scene = bpy.context.scene
+    Collect the world-space geometry that view hashes are computed from.
 
-    # Resolution
-    scene.render.resolution_x = width
-    scene.render.resolution_y = height
-    scene.render.resolution_percentage = 100
-
-    # Output format
-    scene.render.image_settings.file_format = 'PNG'
-    scene.render.image_settings.color_mode = 'RGBA'
-    scene.render.image_settings.compression = 15
+    Returns:
+        tuple: (vertices, face centers, face material ids) as NumPy arrays,
+            or None if the scene is too large to hash cheaply
+    """
+    vertices = []
+    centers = []
+    center_mats = []
+    material_ids = {}
+    for obj in bpy.context.scene.objects:
+        if obj.type != 'MESH':
+            continue
+        mesh = obj.data
+        n = len(mesh.vertices)
+        if n > BOUNDS_VERTEX_LIMIT:
+            return None
+        if n == 0:
+            continue
+        
+        vertices.append(_mesh_world_coords(obj))
+        centers.append(_mesh_world_coords(obj, 'polygons', 'center'))
+        
+        m = len(mesh.polygons)
+        # Slot indices are per object; map them to scene-wide material ids
+        slot_ids = np.array([material_ids.setdefault(slot.material.name if slot.material else None,
+                                                     len(material_ids))
+                             for slot in obj.material_slots] or [0], dtype=np.int64)
+        slots = np.empty(m, dtype=np.int32)
+        mesh.polygons.foreach_get('material_index', slots)
+        center_mats.append(slot_ids[np.clip(slots, 0, len(slot_ids) - 1)])
+    
+    if not vertices:
+        return None
+    return np.concatenate(vertices), np.concatenate(centers), np.concatenate(center_mats)
 
-    # Use Cycles - only renderer that supports Freestyle in headless mode
-    scene.render.engine = 'CYCLES'
 
-    # Configure device based on detection
-    if device_type == 'CPU':
-        scene.cycles.device = 'CPU'
-        # Allow overriding samples via env var, default to 8 for CPU if not set
-        custom_samples = os.environ.get('RENDER_SAMPLES')
-        if custom_samples:
-             scene.cycles.samples = int(custom_samples)
-        else:
-             scene.cycles.samples = 8     # CPU: reduced samples for faster renders
-    else:
-        scene.cycles.device = 'GPU'
-        # Allow overriding samples via env var, default to 128 for GPU if not set
-        custom_samples = os.environ.get('RENDER_SAMPLES')
-        if custom_samples:
-             scene.cycles.samples = int(custom_samples)
-        else:
-             scene.cycles.samples = 128   # GPU: keep higher quality when available
+def compute_view_hash(geometry, view, bounds_center, max_dim):
+    """
+    Hash what the camera sees of the model from view.
 
-    scene.cycles.use_denoising = False  # Keep edges sharp
+    Vertices and material-tagged face centers are projected into the view's
+    camera frame (x, y and depth), quantized and sorted, so two views hash
+    equal when a symmetry of the model maps one onto the other. Occluded
+    points are included, which only makes the test stricter. The view's
+    elevation is part of the hash because the world light varies with Z.
+    """
+    vertices, centers, center_mats = geometry
+    offset, basis = _VIEW_SPEC[view]
+    origin = np.asarray(bounds_center, dtype=np.float64)
+    scale = VIEW_HASH_QUANT / max_dim
     
-    # Transparent background
-    scene.render.film_transparent = True
+    def quantize(points):
+        return np.rint((points - origin) @ basis * scale).astype(np.int64)
     
-    # Enable Freestyle for edge rendering
-    scene.render.use_freestyle = True
+    q_vertices = quantize(vertices)
+    q_centers = np.column_stack((quantize(centers), center_mats))
+    
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(np.float64(round(offset[2], 6)).tobytes())
+    digest.update(q_vertices[np.lexsort(q_vertices.T[::-1])].tobytes())
+    digest.update(q_centers[np.lexsort(q_centers.T[::-1])].tobytes())
+    return digest.digest()
+
+
+def _set_if_supported(settings, name, value):
+    """Set a render option only if this Blender version exposes it."""
+    if hasattr(settings, name):
+        setattr(settings, name, value)
+        return True
+    return False
+
+
+def _configure_tiles(scene, device_type):
+    """Pick a Cycles tile size suited to the render device."""
+    is_gpu = device_type != 'CPU'
+    # Use every core the host reports
+    scene.render.threads_mode = 'AUTO'
+    if bpy.app.version >= (3, 0, 0):
+        # Cycles X renders progressively and tiles only bound memory use, which
+        # preview-sized frames don't need: render the whole frame in one pass
+        # on every device (tile_size only applies if auto tiling is re-enabled)
+        scene.cycles.use_auto_tile = False
+        scene.cycles.tile_size = 2048 if is_gpu else 64
+    else:
+        # Legacy Cycles: large tiles keep GPUs busy, small tiles stay in CPU cache
+        tile = 256 if is_gpu else 64
+        scene.render.tile_x = tile
+        scene.render.tile_y = tile
+
+
+def _setup_freestyle(scene, view_layer):
+    """Configure Freestyle detail and silhouette linesets (RENDER_EDGES=freestyle)."""
     scene.render.line_thickness_mode = 'ABSOLUTE'
     scene.render.line_thickness = 1.5  # Base line thickness
     
-    # Configure Freestyle on view layer
-    view_layer = bpy.context.view_layer
-    view_layer.use_freestyle = True
-    view_layer.use_pass_ambient_occlusion = True
-    
     # Freestyle settings
     freestyle = view_layer.freestyle_settings
     # Crease angle: edges with angle LESS than this are drawn
@@ -623,124 +1250,720 @@ def setup_render_settings(width=800, height=800, max_dim=1.0, device_type='CPU')
     silhouette_style.color = (0.05, 0.05, 0.05)
     silhouette_style.thickness = 2.4
     silhouette_style.alpha = 1.0
+
+
+RENDER_ENGINES = ('CYCLES', 'EEVEE')
+
+
+def render_engine():
+    """Return the render engine selected by RENDER_ENGINE (default CYCLES)."""
+    engine = os.environ.get('RENDER_ENGINE', 'CYCLES').upper()
+    if engine.startswith('BLENDER_EEVEE'):
+        engine = 'EEVEE'
+    if engine not in RENDER_ENGINES:
+        print(f"Warning: Unknown RENDER_ENGINE '{engine}', using CYCLES")
+        engine = 'CYCLES'
+    return engine
+
+
+def _setup_cycles(scene, device_type):
+    """Configure Cycles sampling, denoising and light paths for device_type."""
+    # Configure device based on detection
+    if device_type == 'CPU':
+        scene.cycles.device = 'CPU'
+        # Allow overriding samples via env var, default to 8 for CPU if not set
+        custom_samples = os.environ.get('RENDER_SAMPLES')
+        if custom_samples:
+             scene.cycles.samples = int(custom_samples)
+        else:
+             scene.cycles.samples = 8     # CPU: reduced samples for faster renders
+    else:
+        scene.cycles.device = 'GPU'
+        # Allow overriding samples via env var, default to 24 for GPU if not set
+        custom_samples = os.environ.get('RENDER_SAMPLES')
+        if custom_samples:
+             scene.cycles.samples = int(custom_samples)
+        else:
+             scene.cycles.samples = 24    # GPU: low spp, the denoiser cleans up the rest
+
+    _configure_tiles(scene, device_type)
+
+    # Anti-aliasing jitter is most of the variance in these matte views, so use
+    # a narrow filter and a stratified pattern that converges at low spp.
+    # Adaptive sampling stops early on the large transparent background.
+    scene.cycles.pixel_filter_type = 'GAUSSIAN'
+    scene.cycles.filter_width = 1.5
+    try:
+        scene.cycles.sampling_pattern = 'PROGRESSIVE_MULTI_JITTER'
+    except (AttributeError, TypeError):
+        pass  # Blender 3.5+ renamed the patterns; its default is already stratified
+    _set_if_supported(scene.cycles, 'use_adaptive_sampling', True)
+    _set_if_supported(scene.cycles, 'adaptive_threshold', 0.1)
+    _set_if_supported(scene.cycles, 'adaptive_min_samples', 4)
+
+    # All views share the same geometry, only the camera moves. Persistent data
+    # keeps the synced Cycles scene (and its BVH) alive between render calls;
+    # with a dynamic BVH Cycles refits instead of rebuilding when it must update.
+    scene.render.use_persistent_data = True
+    scene.render.use_lock_interface = True  # No UI to keep responsive when headless
+    _set_if_supported(scene.cycles, 'preview_pause', False)
+    _set_if_supported(scene.cycles, 'debug_bvh_type', 'DYNAMIC_BVH')
+    _set_if_supported(scene.cycles, 'debug_use_spatial_splits', False)
+
+    # Denoise instead of brute-forcing samples. Edge lines (compositor or
+    # Freestyle) are applied after the denoiser runs, so they stay sharp.
+    # The OptiX denoiser needs an OptiX device; plain CUDA devices use OIDN.
+    scene.cycles.use_denoising = True
+    scene.cycles.denoiser = 'OPTIX' if device_type == 'OPTIX' else 'OPENIMAGEDENOISE'
+    _set_if_supported(scene.cycles, 'denoising_input_passes', 'RGB_ALBEDO_NORMAL')
+    # Denoise the albedo/normal guides too (OIDN only), so low spp guides
+    # don't leave noise in the result
+    _set_if_supported(scene.cycles, 'denoising_prefilter', 'ACCURATE')
     
-    # Set world background
-    if scene.world is None:
-        scene.world = bpy.data.worlds.new("World")
-    scene.world.use_nodes = True
-    bg_node = scene.world.node_tree.nodes.get('Background')
-    if bg_node:
-        bg_node.inputs['Color'].default_value = (0.95, 0.95, 0.97, 1.0)  # Light gray
-        bg_node.inputs['Strength'].default_value = 1.0
+    # Matte, opaque materials under studio lights: paths past the first couple
+    # of bounces add nothing visible but cost as much as the first ones
+    scene.cycles.max_bounces = 2
+    scene.cycles.diffuse_bounces = 1
+    scene.cycles.glossy_bounces = 1
+    scene.cycles.transmission_bounces = 0
+    scene.cycles.volume_bounces = 0
+    scene.cycles.transparent_max_bounces = 2
+    scene.cycles.caustics_reflective = False
+    scene.cycles.caustics_refractive = False
+    scene.cycles.sample_clamp_indirect = 1.0  # Suppress fireflies at low spp
+    scene.cycles.blur_glossy = 1.0  # Filter glossy: trades sharp reflections for less noise
+    
+    # No experimental features (adaptive subdivision etc.) and no motion blur
+    # keep the kernel free of code paths these static parts never use
+    scene.cycles.feature_set = 'SUPPORTED'
+    scene.render.use_motion_blur = False
+
+
+def _setup_eevee(scene):
+    """
+    Configure EEVEE for fast rasterized previews.
+
+    EEVEE draws through Blender's own OpenGL/Vulkan context, so the Cycles
+    compute device settings don't apply.
+    """
+    # Blender 4.2+ replaced EEVEE with EEVEE Next under a new engine id
+    for engine_id in ('BLENDER_EEVEE_NEXT', 'BLENDER_EEVEE'):
+        try:
+            scene.render.engine = engine_id
+            break
+        except TypeError:
+            continue
+    
+    scene.eevee.taa_render_samples = int(os.environ.get('RENDER_SAMPLES', '8'))
+    _set_if_supported(scene.eevee, 'use_ssr', False)
+    _set_if_supported(scene.eevee, 'use_bloom', False)
+    # The AO pass feeding the compositor needs GTAO in legacy EEVEE
+    _set_if_supported(scene.eevee, 'use_gtao', True)
+
+
+def setup_render_settings(width=800, height=800, max_dim=1.0, device_type='CPU'):
+    """Configure render settings for optimal feature visibility.
+
+    Uses Cycles renderer with compositor edge detection (or Freestyle when
+    RENDER_EDGES=freestyle) for edge rendering.
+    EEVEE doesn't support Freestyle in Blender 2.82, and Workbench
+    crashes in headless/WSL environments (needs OpenGL). EEVEE has the
+    same OpenGL requirement, so it is only used with RENDER_ENGINE=EEVEE.
+
+    Args:
+        width: Render width in pixels
+        height: Render height in pixels
+        max_dim: Maximum dimension of the model
+        device_type: 'CPU', 'CUDA', 'OPTIX', or 'HIP'
+    """
+    scene = bpy.context.scene
+
+    # Nothing below depends on the model, so in batch mode later models skip
+    # the rebuild as long as resolution and device are unchanged
+    edge_mode = os.environ.get('RENDER_EDGES', 'compositor').lower()
+    engine = render_engine()
+    setup_key = f"{width}x{height}:{engine}:{device_type}:{edge_mode}"
+    if scene.get('forge_setup_done') == setup_key:
+        return
+
+    # Resolution
+    scene.render.resolution_x = width
+    scene.render.resolution_y = height
+    scene.render.resolution_percentage = 100
+
+    # Output format
+    scene.render.image_settings.file_format = 'PNG'
+    scene.render.image_settings.color_mode = 'RGBA'
+    scene.render.image_settings.color_depth = '8'
+    # Previews are read back right away from local disk; deflate effort costs
+    # more main-thread time than the larger files do
+    scene.render.image_settings.compression = int(os.environ.get('RENDER_PNG_COMPRESSION', '0'))
+
+    # Plain sRGB output: no Filmic tonemapping LUT per pixel, and the threaded
+    # PNG writer can reproduce it exactly
+    scene.display_settings.display_device = 'sRGB'
+    scene.view_settings.view_transform = 'Standard'
+    scene.view_settings.look = 'None'
+    scene.view_settings.exposure = 0.0
+    scene.view_settings.gamma = 1.0
+    scene.view_settings.use_curve_mapping = False
+
+    if engine == 'EEVEE':
+        _setup_eevee(scene)
+    else:
+        # Use Cycles - only renderer that supports Freestyle in headless mode
+        scene.render.engine = 'CYCLES'
+        _setup_cycles(scene, device_type)
+    
+    # Transparent background
+    scene.render.film_transparent = True
+    
+    # Edge lines: compositor Sobel filter on the Normal/Depth passes by default.
+    # Freestyle is a single-threaded CPU pass that dominates low-spp GPU renders;
+    # RENDER_EDGES=freestyle brings it back.
+    use_freestyle = edge_mode == 'freestyle'
+    scene.render.use_freestyle = use_freestyle
+    
+    view_layer = bpy.context.view_layer
+    view_layer.use_freestyle = use_freestyle
+    view_layer.use_pass_ambient_occlusion = True
+    if use_freestyle:
+        _setup_freestyle(scene, view_layer)
+    else:
+        view_layer.use_pass_normal = True
+        view_layer.use_pass_z = True
+    
+    setup_ambient_occlusion_compositor(edge_lines=not use_freestyle)
+
+    scene['forge_setup_done'] = setup_key
 
-    setup_ambient_occlusion_compositor()
 
+def _get_or_create_node(tree, node_type, name):
+    """
+    Return the node called name, creating it if missing.
+
+    Returns:
+        tuple: (node, created) - created is True if the node was just added
+    """
+    node = tree.nodes.get(name)
+    if node is not None and node.bl_idname == node_type:
+        return node, False
+    if node is not None:
+        tree.nodes.remove(node)
+    node = tree.nodes.new(node_type)
+    node.name = name
+    node.label = name
+    return node, True
+
+
+def setup_ambient_occlusion_compositor(ao_strength: float = 0.35, cavity_strength: float = 0.2,
+                                       edge_lines: bool = False):
+    """
+    Overlay ambient occlusion and cavity shading for on-model shadows.
+
+    With edge_lines, crease and silhouette lines detected from the Normal and
+    Depth passes are drawn on top (replacement for Freestyle).
 
-def setup_ambient_occlusion_compositor(ao_strength: float = 0.35, cavity_strength: float = 0.2):
-    """Overlay ambient occlusion and cavity shading for on-model shadows."""
+    The node tree is built idempotently: nodes are looked up by name and only
+    created (and their curves shaped) when missing, so repeated calls reuse it.
+    """
     scene = bpy.context.scene
     scene.use_nodes = True
     tree = scene.node_tree
-    tree.nodes.clear()
 
-    render_layer = tree.nodes.new('CompositorNodeRLayers')
+    render_layer, _ = _get_or_create_node(tree, 'CompositorNodeRLayers', 'Render Layers')
+    composite, _ = _get_or_create_node(tree, 'CompositorNodeComposite', 'Composite')
     ao_output = render_layer.outputs.get('AO') or render_layer.outputs.get('Ambient Occlusion')
+    image_output = render_layer.outputs['Image']
+    alpha_output = render_layer.outputs.get('Alpha')
     
-    if not ao_output:
-        composite = tree.nodes.new('CompositorNodeComposite')
-        tree.links.new(render_layer.outputs['Image'], composite.inputs['Image'])
-        alpha_output = render_layer.outputs.get('Alpha')
-        if alpha_output:
-            tree.links.new(alpha_output, composite.inputs['Alpha'])
-        return
+    if ao_output:
+        ao_curve, created = _get_or_create_node(tree, 'CompositorNodeCurveRGB', 'AO Curve')
+        if created:
+            ao_curve.mapping.curves[3].points.new(0.4, 0.2)
+            ao_curve.mapping.curves[3].points.new(0.8, 0.6)
+        tree.links.new(ao_output, ao_curve.inputs['Image'])
+        
+        ao_mix, _ = _get_or_create_node(tree, 'CompositorNodeMixRGB', 'AO Mix')
+        ao_mix.blend_type = 'MULTIPLY'
+        ao_mix.inputs[0].default_value = ao_strength
+        tree.links.new(image_output, ao_mix.inputs[1])
+        tree.links.new(ao_curve.outputs['Image'], ao_mix.inputs[2])
+        
+        cavity_curve, created = _get_or_create_node(tree, 'CompositorNodeCurveRGB', 'Cavity Curve')
+        if created:
+            cavity_curve.mapping.curves[3].points.new(0.2, 0.0)
+            cavity_curve.mapping.curves[3].points.new(0.6, 0.1)
+        tree.links.new(ao_output, cavity_curve.inputs['Image'])
+        
+        cavity_mix, _ = _get_or_create_node(tree, 'CompositorNodeMixRGB', 'Cavity Mix')
+        cavity_mix.blend_type = 'MULTIPLY'
+        cavity_mix.inputs[0].default_value = cavity_strength
+        tree.links.new(ao_mix.outputs['Image'], cavity_mix.inputs[1])
+        tree.links.new(cavity_curve.outputs['Image'], cavity_mix.inputs[2])
+        image_output = cavity_mix.outputs[0]
     
-    ao_curve = tree.nodes.new('CompositorNodeCurveRGB')
-    ao_curve.label = 'AO Curve'
-    tree.links.new(ao_output, ao_curve.inputs['Image'])
-    ao_curve.mapping.curves[3].points.new(0.4, 0.2)
-    ao_curve.mapping.curves[3].points.new(0.8, 0.6)
-    
-    ao_mix = tree.nodes.new('CompositorNodeMixRGB')
-    ao_mix.blend_type = 'MULTIPLY'
-    ao_mix.inputs[0].default_value = ao_strength
-    tree.links.new(render_layer.outputs['Image'], ao_mix.inputs[1])
-    tree.links.new(ao_curve.outputs['Image'], ao_mix.inputs[2])
-    
-    cavity_curve = tree.nodes.new('CompositorNodeCurveRGB')
-    cavity_curve.label = 'Cavity Curve'
-    tree.links.new(ao_output, cavity_curve.inputs['Image'])
-    cavity_curve.mapping.curves[3].points.new(0.2, 0.0)
-    cavity_curve.mapping.curves[3].points.new(0.6, 0.1)
-    
-    cavity_mix = tree.nodes.new('CompositorNodeMixRGB')
-    cavity_mix.blend_type = 'MULTIPLY'
-    cavity_mix.inputs[0].default_value = cavity_strength
-    tree.links.new(ao_mix.outputs['Image'], cavity_mix.inputs[1])
-    tree.links.new(cavity_curve.outputs['Image'], cavity_mix.inputs[2])
-    
-    composite = tree.nodes.new('CompositorNodeComposite')
-    tree.links.new(cavity_mix.outputs[0], composite.inputs['Image'])
+    if edge_lines:
+        image_output, alpha_output = _add_edge_overlay(tree, render_layer, image_output, alpha_output)
     
-    alpha_output = render_layer.outputs.get('Alpha')
+    tree.links.new(image_output, composite.inputs['Image'])
     if alpha_output:
         tree.links.new(alpha_output, composite.inputs['Alpha'])
+    setup_viewer_output(tree, image_output, alpha_output)
+
+
+def _sobel_edge_mask(tree, name, source, threshold):
+    """Add Sobel filter + threshold nodes on source; return the 0/1 mask socket."""
+    sobel, _ = _get_or_create_node(tree, 'CompositorNodeFilter', f'{name} Sobel')
+    sobel.filter_type = 'SOBEL'
+    tree.links.new(source, sobel.inputs['Image'])
+    
+    mask, _ = _get_or_create_node(tree, 'CompositorNodeMath', f'{name} Mask')
+    mask.operation = 'GREATER_THAN'
+    mask.inputs[1].default_value = threshold
+    tree.links.new(sobel.outputs['Image'], mask.inputs[0])
+    return mask.outputs['Value']
+
+
+def _add_edge_overlay(tree, render_layer, image_output, alpha_output,
+                      line_color=(0.05, 0.05, 0.05, 1.0)):
+    """
+    Draw edge lines over the image using the Normal and Depth passes.
+
+    Sobel on the Normal pass picks up creases and material-independent
+    feature edges; Sobel on the normalized Depth pass picks up the outer
+    contour. Lines are also written into alpha so silhouettes stay visible
+    on the transparent background.
+
+    Returns:
+        tuple: (image socket, alpha socket) to feed the Composite node
+    """
+    normal_output = render_layer.outputs.get('Normal')
+    depth_output = render_layer.outputs.get('Depth') or render_layer.outputs.get('Z')
+    if not normal_output or not depth_output:
+        print("Warning: Normal/Depth passes unavailable, rendering without edge lines")
+        return image_output, alpha_output
+    
+    crease_mask = _sobel_edge_mask(tree, 'Normal Edges', normal_output, threshold=0.6)
+    
+    depth_norm, _ = _get_or_create_node(tree, 'CompositorNodeNormalize', 'Depth Normalize')
+    tree.links.new(depth_output, depth_norm.inputs[0])
+    contour_mask = _sobel_edge_mask(tree, 'Depth Edges', depth_norm.outputs[0], threshold=0.1)
+    
+    edge_mask, _ = _get_or_create_node(tree, 'CompositorNodeMath', 'Edge Mask')
+    edge_mask.operation = 'MAXIMUM'
+    tree.links.new(crease_mask, edge_mask.inputs[0])
+    tree.links.new(contour_mask, edge_mask.inputs[1])
+    
+    edge_mix, _ = _get_or_create_node(tree, 'CompositorNodeMixRGB', 'Edge Overlay')
+    edge_mix.blend_type = 'MIX'
+    tree.links.new(edge_mask.outputs['Value'], edge_mix.inputs[0])
+    tree.links.new(image_output, edge_mix.inputs[1])
+    edge_mix.inputs[2].default_value = line_color
+    
+    if alpha_output:
+        edge_alpha, _ = _get_or_create_node(tree, 'CompositorNodeMath', 'Edge Alpha')
+        edge_alpha.operation = 'MAXIMUM'
+        tree.links.new(alpha_output, edge_alpha.inputs[0])
+        tree.links.new(edge_mask.outputs['Value'], edge_alpha.inputs[1])
+        alpha_output = edge_alpha.outputs['Value']
+    
+    return edge_mix.outputs['Image'], alpha_output
+
+
+def setup_viewer_output(tree, image_output, alpha_output):
+    """Mirror the composited image into a Viewer node for direct pixel readback."""
+    viewer, _ = _get_or_create_node(tree, 'CompositorNodeViewer', 'Viewer')
+    viewer.use_alpha = True
+    tree.links.new(image_output, viewer.inputs['Image'])
+    if alpha_output and viewer.inputs.get('Alpha'):
+        tree.links.new(alpha_output, viewer.inputs['Alpha'])
+    tree.nodes.active = viewer
+
+
+PNG_WRITER_THREADS = 2
+# One buffer being filled by readback while each writer thread encodes another
+READBACK_BUFFERS = PNG_WRITER_THREADS + 1
+
+
+def _read_viewer_pixels(width, height, out=None):
+    """
+    Copy the Viewer node's RGBA float pixels into a NumPy buffer (or None).
+
+    Fills out in place when it is given and large enough.
+    """
+    image = bpy.data.images.get('Viewer Node')
+    if image is None or tuple(image.size) != (width, height):
+        return None
+    if out is None or out.size != width * height * 4:
+        out = np.empty(width * height * 4, dtype=np.float32)
+    image.pixels.foreach_get(out)
+    return out
+
+
+def _png_chunk(tag, data):
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+
+@functools.lru_cache(maxsize=8)
+def _bilinear_weights(src, dst):
+    """Return the (dst, src) matrix that linearly resamples one image axis."""
+    weights = np.zeros((dst, src), dtype=np.float32)
+    # Pixel centers sit at half-integer positions on both grids
+    pos = np.clip((np.arange(dst) + 0.5) * (src / dst) - 0.5, 0, src - 1)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, src - 1)
+    frac = (pos - lo).astype(np.float32)
+    rows = np.arange(dst)
+    np.add.at(weights, (rows, lo), 1.0 - frac)
+    np.add.at(weights, (rows, hi), frac)
+    return weights
+
+
+def resize_bilinear(rgba, width, height):
+    """
+    Resample an (h, w, 4) float image to (height, width, 4).
+
+    Separable bilinear filter applied as two matrix products, one per axis;
+    run on premultiplied pixels so edges against transparency don't fringe.
+    """
+    h, w, channels = rgba.shape
+    rows = _bilinear_weights(h, height) @ rgba.reshape(h, w * channels)
+    cols = rows.reshape(height, w, channels).transpose(0, 2, 1) @ _bilinear_weights(w, width).T
+    return np.ascontiguousarray(cols.transpose(0, 2, 1))
+
+
+def write_png(path, pixels, width, height, compression=0, output_size=None):
+    """
+    Encode linear, premultiplied RGBA float pixels as an 8-bit sRGB PNG.
+
+    Matches what Blender writes for a transparent-film render with the
+    Standard view transform: alpha is unpremultiplied and colors go through
+    the sRGB transfer function. zlib releases the GIL, so this runs in
+    parallel with the next render.
+
+    Args:
+        pixels: Flat float32 buffer, bottom row first (Blender image order)
+        compression: Blender-style PNG compression, 0-100
+        output_size: (width, height) to upscale to, if not the render size
+    """
+    rgba = pixels.reshape(height, width, 4)[::-1]
+    if output_size and tuple(output_size) != (width, height):
+        width, height = output_size
+        rgba = resize_bilinear(rgba, width, height)
+    alpha = np.clip(rgba[..., 3:], 0.0, 1.0)
+    rgb = np.divide(rgba[..., :3], alpha, out=np.zeros((height, width, 3), np.float32), where=alpha > 0)
+    np.clip(rgb, 0.0, 1.0, out=rgb)
+    srgb = np.where(rgb <= 0.0031308, rgb * 12.92, 1.055 * np.power(rgb, 1 / 2.4) - 0.055)
+    
+    # Each scanline starts with filter type 0 (None)
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    rows = raw[:, 1:].reshape(height, width, 4)
+    rows[..., :3] = np.rint(srgb * 255)
+    rows[..., 3] = np.rint(alpha[..., 0] * 255)
+    
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)  # 8-bit RGBA
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(_png_chunk(b'IHDR', header))
+        f.write(_png_chunk(b'IDAT', zlib.compress(raw.tobytes(), round(compression * 9 / 100))))
+        f.write(_png_chunk(b'IEND', b''))
+    return True
+
+
+def _upscale_png(path, output_size):
+    """Rescale a PNG saved at render size to output_size, in place."""
+    image = bpy.data.images.load(path)
+    try:
+        if tuple(image.size) != tuple(output_size):
+            image.scale(*output_size)
+            image.save()
+    finally:
+        bpy.data.images.remove(image)
+
+
+def _completed(value):
+    """Wrap an already known result in a Future."""
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def _copy_when_written(write, src, dst):
+    """Copy src to dst once the write producing src has finished."""
+    if not write.result():
+        return False
+    shutil.copyfile(src, dst)
+    return True
+
+
+def render_view(cam_obj, output_path, writer, output_size=None, buffer=None):
+    """
+    Render the scene through an already placed view camera and save to file.
 
+    Only the active camera changes between views, so with persistent data
+    Cycles reuses the synced scene and BVH from the previous render.
 
-def render_view(view_name, output_path, bounds_center, bounds_size, max_dim=None):
-    """Render a single view and save to file."""
-    setup_camera_for_view(view_name, bounds_center, bounds_size, max_dim)
+    The composited pixels are read back from the Viewer node into buffer (a
+    reusable float32 array, allocated if None) and the PNG is encoded (and
+    upscaled to output_size) on the writer pool while the next view renders.
+    The caller must not reuse buffer until the Future is done.
+
+    Returns:
+        Future: resolves to True if the file was written
+    """
+    scene = bpy.context.scene
+    scene.camera = cam_obj
     
     # Set output path
-    bpy.context.scene.render.filepath = output_path
+    scene.render.filepath = output_path
     
-    # Render
-    bpy.ops.render.render(write_still=True)
+    bpy.ops.render.render(write_still=False)
+    width, height = scene.render.resolution_x, scene.render.resolution_y
+    pixels = _read_viewer_pixels(width, height, buffer)
+    if pixels is None:
+        # Viewer wasn't updated; let Blender save the render result itself
+        # and bring it to the same size as the other views
+        bpy.data.images['Render Result'].save_render(output_path, scene=scene)
+        if not os.path.exists(output_path):
+            return _completed(False)
+        if output_size:
+            _upscale_png(output_path, output_size)
+        return _completed(True)
     
-    return os.path.exists(output_path)
+    compression = scene.render.image_settings.compression
+    return writer.submit(write_png, output_path, pixels, width, height, compression, output_size)
 
 
-def main():
-    """Main entry point."""
-    # Parse arguments after '--'
-    argv = sys.argv
-    if '--' in argv:
-        argv = argv[argv.index('--') + 1:]
-    else:
-        print("Usage: blender --background --python render3mf.py -- <input.3mf> <output_dir> [views...]")
-        sys.exit(1)
+USAGE = (
+    "Usage: blender --background --python render3mf.py -- <input.3mf> <output_dir> [views...] [--split-per-gpu] [--quality=high]\n"
+    "       blender --background --python render3mf.py -- --batch [views...] [--split-per-gpu] [--quality=high] < jobs.txt\n"
+    "       blender --background --python render3mf.py -- --serve [views...] [--split-per-gpu] [--quality=high] < jobs.jsonl"
+)
+
+QUALITY_LEVELS = ('preview', 'high')
+
+DEFAULT_VIEWS = list(View)
+
+
+def parse_options(argv):
+    """Split script arguments into positionals and '--flag[=value]' options."""
+    positional = []
+    options = {}
+    for arg in argv:
+        if arg.startswith('--'):
+            key, _, value = arg[2:].partition('=')
+            options[key] = value or True
+        else:
+            positional.append(arg)
+    return positional, options
+
+
+def parse_views(args):
+    """Map requested view names to View members (default: all standard views)."""
+    if not args:
+        return list(DEFAULT_VIEWS)
+    views = []
+    for name in args:
+        view = VIEW_BY_NAME.get(name)
+        if view is None:
+            print(f"Warning: Unknown view '{name}', skipping")
+            continue
+        views.append(view)
+    return views
+
+
+def render_views(views, output_dir, bounds_center, max_dim):
+    """
+    Render each view of the current scene into output_dir.
+
+    With RENDER_DEDUP_VIEWS=1, views that a symmetry of the model makes
+    identical to an already rendered one are copied instead of rendered.
+    This is only done without area lights: the rig is asymmetric, while the
+    preview gradient world only varies with height.
+
+    A view that fails to render is reported as 'failed' and the remaining
+    views still render, so the caller can publish the ones that succeeded.
+
+    Returns:
+        dict: view name -> 'success', 'success (dedup)' or 'failed'
+    """
+    view_cache = view_camera_matrices(views, bounds_center, max_dim)
+    cameras = setup_view_cameras(view_cache, max_dim)
     
-    if len(argv) < 2:
-        print("Error: Missing required arguments")
-        print("Usage: blender --background --python render3mf.py -- <input.3mf> <output_dir> [views...]")
-        sys.exit(1)
+    geometry = None
+    if (os.environ.get('RENDER_DEDUP_VIEWS') == '1'
+            and not any(obj.type == 'LIGHT' for obj in bpy.context.scene.objects)):
+        geometry = view_hash_geometry()
+    seen_hashes = {}  # view hash -> view rendered for it
+    
+    scene = bpy.context.scene
+    output_resolution = scene.get('forge_output_resolution', scene.render.resolution_x)
+    output_size = (output_resolution, output_resolution)
     
-    input_file = argv[0]
-    output_dir = argv[1]
+    # Upscaling to output_size happens in write_png() on the writer threads,
+    # overlapped with the next render. A compositor Scale -> File Output save
+    # would run inside the render call and serialize with it.
+    # setup_render_settings() pins the Standard view transform write_png()
+    # reproduces, and the compositor always feeds a Viewer node.
+    writer = ThreadPoolExecutor(max_workers=PNG_WRITER_THREADS)
+    # Readback goes into a small ring of preallocated buffers; a buffer is
+    # reused once the encode reading from it has finished
+    pixel_count = scene.render.resolution_x * scene.render.resolution_y * 4
+    readback = [(np.empty(pixel_count, dtype=np.float32), None) for _ in range(READBACK_BUFFERS)]
     
-    # Parse views (default: all standard views)
-    default_views = ['iso', 'front', 'back', 'left', 'right', 'top', 'bottom']
-    views = argv[2:] if len(argv) > 2 else default_views
+    writes = {}  # view -> Future resolving to True once its PNG is on disk
+    deduped = set()
+    rendered = 0
+    try:
+        for view in views:
+            output_path = os.path.join(output_dir, f"preview_{view}.png")
+            view_hash = compute_view_hash(geometry, view, bounds_center, max_dim) if geometry else None
+            if view_hash in seen_hashes:
+                source = seen_hashes[view_hash]
+                source_path = os.path.join(output_dir, f"preview_{source}.png")
+                print(f"View {view} matches {source}, copying")
+                writes[view] = writer.submit(_copy_when_written, writes[source], source_path, output_path)
+                deduped.add(view)
+                continue
+            
+            print(f"Rendering view: {view} -> {output_path}")
+            try:
+                slot = rendered % READBACK_BUFFERS
+                buffer, in_flight = readback[slot]
+                if in_flight is not None:
+                    wait([in_flight])
+                writes[view] = render_view(cameras[view], output_path, writer, output_size, buffer)
+                readback[slot] = (buffer, writes[view])
+            except Exception as e:
+                print(f"Error rendering view {view}: {e}")
+                writes[view] = _completed(False)
+                continue
+            rendered += 1
+            if view_hash is not None:
+                seen_hashes[view_hash] = view
+    finally:
+        # Wait for the last encodes before anyone looks at the files
+        writer.shutdown(wait=True)
     
-    # Validate views
-    valid_views = {'iso', 'front', 'back', 'left', 'right', 'top', 'bottom'}
-    for v in views:
-        if v not in valid_views:
-            print(f"Warning: Unknown view '{v}', skipping")
-    views = [v for v in views if v in valid_views]
+    results = {}
+    for view, write in writes.items():
+        try:
+            written = write.result()
+        except Exception as e:
+            print(f"Error writing {view}: {e}")
+            written = False
+        if not written:
+            results[view.label] = 'failed'
+        else:
+            results[view.label] = 'success (dedup)' if view in deduped else 'success'
     
+    return results
+
+
+WORKER_STOP_TIMEOUT = 10
+PR_SET_PDEATHSIG = 1
+
+
+def _die_with_parent():
+    """Have the kernel SIGTERM this worker when its parent exits (Linux only)."""
+    try:
+        ctypes.CDLL(None, use_errno=True).prctl(PR_SET_PDEATHSIG, signal.SIGTERM)
+    except (OSError, AttributeError):
+        pass
+
+
+def render_views_per_gpu(views, output_dir, device_type, gpu_count):
+    """
+    Render views concurrently with one Blender worker process per GPU.
+
+    The prepared scene is saved to a temporary .blend that every worker
+    opens, so import and scene setup happen once. Each worker is pinned to
+    a single device via CUDA_VISIBLE_DEVICES / HIP_VISIBLE_DEVICES and
+    renders its round-robin share of the views. If this process is itself
+    restricted to some devices, workers are pinned within that list.
+
+    Returns:
+        dict: view name -> 'success', 'failed' or 'error'
+    """
+    visible_devices_env = 'HIP_VISIBLE_DEVICES' if device_type == 'HIP' else 'CUDA_VISIBLE_DEVICES'
+    # Cycles counted the devices we were given, so gpu_idx indexes this list
+    visible_devices = [d.strip() for d in os.environ.get(visible_devices_env, '').split(',') if d.strip()]
+    tmp_dir = tempfile.mkdtemp(prefix=_scratch_prefix('forge_render_'))
+    blend_path = os.path.join(tmp_dir, 'scene.blend')
+    
+    workers = []
+    try:
+        bpy.ops.wm.save_as_mainfile(filepath=blend_path, copy=True)
+        
+        for gpu_idx in range(gpu_count):
+            shard = views[gpu_idx::gpu_count]
+            if not shard:
+                continue
+            env = dict(os.environ)
+            env[visible_devices_env] = (visible_devices[gpu_idx] if gpu_idx < len(visible_devices)
+                                        else str(gpu_idx))
+            env[GPU_BACKEND_ENV] = device_type
+            cmd = [bpy.app.binary_path, '--background', blend_path,
+                   '--python', os.path.abspath(__file__),
+                   '--', '--render-only', output_dir] + [view.label for view in shard]
+            print(f"[GPU] Worker {gpu_idx}: {', '.join(view.label for view in shard)}")
+            workers.append((shard, subprocess.Popen(cmd, env=env, preexec_fn=_die_with_parent)))
+        
+        results = {}
+        for shard, proc in workers:
+            returncode = proc.wait()
+            for view in shard:
+                output_path = os.path.join(output_dir, f"preview_{view}.png")
+                if os.path.exists(output_path):
+                    results[view.label] = 'success'
+                else:
+                    results[view.label] = 'failed' if returncode == 0 else 'error'
+    finally:
+        # Only still running if we are unwinding from an error
+        for _, proc in workers:
+            if proc.poll() is None:
+                proc.terminate()
+                try:
+                    proc.wait(timeout=WORKER_STOP_TIMEOUT)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    proc.wait()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    
+    return {view.label: results[view.label] for view in views}
+
+
+def render_model(input_file, output_dir, views, device_type, resolution, split_gpus=False,
+                 quality='preview', internal_resolution=None):
+    """
+    Import one 3MF file and render the requested views into output_dir.
+
+    The camera, lights and render settings persist in the scene between
+    calls, so consecutive models only pay for geometry import and rendering.
+
+    Args:
+        split_gpus: Render on every GPU in parallel (one worker process per
+            device) when more than one is available
+        quality: 'preview' (gradient world lighting) or 'high' (area light rig)
+        internal_resolution: Resolution Cycles renders at before the PNG
+            writer upscales to resolution (default: render at resolution)
+
+    Returns:
+        dict: view name -> 'success', 'failed' or 'error'
+
+    Raises:
+        Exception: if the 3MF file cannot be imported
+    """
     # Create output directory
     os.makedirs(output_dir, exist_ok=True)
     
-    # Clear scene
-    clear_scene()
+    # Drop the previous model, keep camera/lights for repositioning
+    clear_scene(keep_rig=True)
     
     # Import 3MF
     print(f"Importing: {input_file}")
-    try:
-        import_3mf(input_file)
-    except Exception as e:
-        print(f"Error importing 3MF: {e}")
-        sys.exit(1)
+    import_3mf(input_file)
     
     # Apply materials for proper 3D visualization
     setup_materials()
@@ -749,46 +1972,343 @@ def main():
     bounds_center, bounds_size = get_scene_bounds()
     print(f"Model bounds: center={bounds_center}, size={bounds_size}")
 
-    # Detect and configure GPU
-    print("\n=== GPU Detection ===")
-    device_type = detect_gpu_backend()
-    configure_gpu_device(device_type)
-    print("====================\n")
-
     # Setup lighting and render settings
     max_dim = max(bounds_size.x, bounds_size.y, bounds_size.z, 1.0)
-    setup_lighting(bounds_center, max_dim)
+    setup_lighting(bounds_center, max_dim, quality)
+    internal_resolution = min(internal_resolution or resolution, resolution)
+    setup_render_settings(width=internal_resolution, height=internal_resolution,
+                          max_dim=max_dim, device_type=device_type)
+    # Stored in the scene so --split-per-gpu workers see it in the saved .blend
+    bpy.context.scene['forge_output_resolution'] = resolution
     
-    # Get resolution from env or default to 500
-    resolution = int(os.environ.get('RENDER_RESOLUTION', '500'))
-    setup_render_settings(width=resolution, height=resolution, max_dim=max_dim, device_type=device_type)
+    stage_dir = _make_stage_dir()
+    try:
+        gpu_count = gpu_device_count(device_type) if split_gpus else 0
+        if gpu_count > 1 and len(views) > 1:
+            print(f"[GPU] Splitting {len(views)} views across {gpu_count} GPUs")
+            results = render_views_per_gpu(views, stage_dir or output_dir, device_type, gpu_count)
+        else:
+            results = render_views(views, stage_dir or output_dir, bounds_center, max_dim)
+        if stage_dir:
+            _publish_views(results, stage_dir, output_dir)
+    finally:
+        if stage_dir:
+            shutil.rmtree(stage_dir, ignore_errors=True)
     
-    # Render each view
-    results = {}
-    for view in views:
-        output_path = os.path.join(output_dir, f"preview_{view}.png")
-        print(f"Rendering view: {view} -> {output_path}")
-        try:
-            success = render_view(view, output_path, bounds_center, bounds_size, max_dim)
-            results[view] = 'success' if success else 'failed'
-        except Exception as e:
-            print(f"Error rendering {view}: {e}")
-            results[view] = 'error'
+    return results
+
+
+def _scratch_prefix(prefix):
+    """Tag a scratch directory prefix with our pid for remove_stale_scratch()."""
+    return f"{prefix}{os.getpid()}_"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def remove_stale_scratch():
+    """
+    Remove stage and per-GPU scratch directories left by dead processes.
+
+    A timed out render is SIGTERMed while Blender is inside the C render
+    loop, where no Python cleanup can run, so leftovers are collected by
+    the next process instead. Directories of live processes are kept.
+    """
+    patterns = (os.path.join('/dev/shm', 'forge_views_*'),
+                os.path.join(tempfile.gettempdir(), 'forge_render_*'))
+    for pattern in patterns:
+        for path in glob.glob(pattern):
+            pid = os.path.basename(path).split('_')[2]
+            if pid.isdigit() and not _pid_alive(int(pid)):
+                shutil.rmtree(path, ignore_errors=True)
+
+
+def _make_stage_dir():
+    """
+    Create a tmpfs directory to render views into, or return None.
+
+    Renders land in RAM and are moved to the output directory once at the
+    end, so slow or network-mounted output storage never stalls a render.
+    Disabled with RENDER_TMPFS=0 or when /dev/shm is unavailable.
+    """
+    if os.environ.get('RENDER_TMPFS', '1') != '1' or not os.path.isdir('/dev/shm'):
+        return None
+    try:
+        return tempfile.mkdtemp(prefix=_scratch_prefix('forge_views_'), dir='/dev/shm')
+    except OSError as e:
+        print(f"Warning: Cannot stage renders in /dev/shm ({e}), writing to the output directory")
+        return None
+
+
+def _publish_views(results, stage_dir, output_dir):
+    """
+    Move rendered views from stage_dir into output_dir.
+
+    /dev/shm is a different filesystem, so each file is copied next to its
+    destination and then renamed over it: readers never see a partial PNG.
+    """
+    for view, status in results.items():
+        if not status.startswith('success'):
+            continue
+        name = f"preview_{view}.png"
+        partial = os.path.join(output_dir, f".{name}.partial")
+        shutil.move(os.path.join(stage_dir, name), partial)
+        os.replace(partial, os.path.join(output_dir, name))
+
+
+def render_saved_scene(output_dir, views):
+    """
+    Render views of the already-loaded .blend scene (--split-per-gpu worker).
+
+    Render settings, camera and lights come from the saved file; only the
+    device preferences, which are not stored in .blend files, are set here.
+    """
+    device_type = detect_gpu_backend()
+    configure_gpu_device(device_type)
     
-    # Print summary
+    bounds_center, bounds_size = get_scene_bounds()
+    max_dim = max(bounds_size.x, bounds_size.y, bounds_size.z, 1.0)
+    return render_views(views, output_dir, bounds_center, max_dim)
+
+
+def print_summary(results, views):
+    """Print per-view render status and return the number of successful views."""
     print("\nRender Summary:")
-    for view, status in results.items():
-        print(f"  {view}: {status}")
+    print("\n".join(f"  {view}: {status}" for view, status in results.items()))
     
-    # Exit with success if at least one view rendered
-    successful = sum(1 for s in results.values() if s == 'success')
+    counts = Counter(results.values())
+    successful = counts['success'] + counts['success (dedup)']
     print(f"\nCompleted: {successful}/{len(views)} views rendered")
+    return successful
+
+
+def run_batch(views, device_type, resolution, split_gpus=False, quality='preview',
+              internal_resolution=None):
+    """
+    Render many models in this Blender process.
+
+    Reads one '<input.3mf> <output_dir>' job per line from stdin (shell-style
+    quoting is honoured) and amortizes Blender startup across all of them.
+
+    Returns:
+        int: number of models for which no view rendered
+    """
+    failures = 0
+    for line in sys.stdin:
+        try:
+            job = shlex.split(line)
+        except ValueError as e:
+            print(f"Error: Invalid batch line {line.strip()!r}: {e}")
+            failures += 1
+            continue
+        if not job:
+            continue
+        if len(job) != 2:
+            print(f"Error: Expected '<input.3mf> <output_dir>', got {line.strip()!r}")
+            failures += 1
+            continue
+        
+        input_file, output_dir = job
+        try:
+            results = render_model(input_file, output_dir, views, device_type, resolution,
+                                   split_gpus, quality, internal_resolution)
+        except Exception as e:
+            print(f"Error rendering 3MF {input_file}: {e}")
+            failures += 1
+            continue
+        
+        if print_summary(results, views) == 0:
+            failures += 1
+    
+    return failures
+
+
+def main_for_job(job, views, device_type, resolution, split_gpus=False, quality='preview',
+                 internal_resolution=None):
+    """
+    Render one --serve job and return its JSON-serializable result.
+
+    Args:
+        job: dict with 'model_path' and 'output_dir', optionally 'views' and
+            'quality' overriding the command line defaults
+
+    Returns:
+        dict: {'status': 'ok' | 'failed' | 'error', 'views': {view: status}},
+            plus 'error' with a message when the job could not run
+    """
+    if not isinstance(job, dict) or 'model_path' not in job or 'output_dir' not in job:
+        return {'status': 'error', 'views': {}, 'error': "Expected 'model_path' and 'output_dir'"}
+    
+    job_views = job.get('views')
+    if isinstance(job_views, str):
+        job_views = [job_views]
+    if job_views is not None and not (
+            isinstance(job_views, list) and all(isinstance(v, str) for v in job_views)):
+        return {'status': 'error', 'views': {}, 'error': "'views' must be a string or a list of strings"}
+    if job_views:
+        views = parse_views(job_views)
+    quality = job.get('quality', quality)
+    if quality not in QUALITY_LEVELS:
+        return {'status': 'error', 'views': {}, 'error': f"Unknown quality '{quality}'"}
     
-    if successful == 0:
+    try:
+        results = render_model(job['model_path'], job['output_dir'], views, device_type, resolution,
+                               split_gpus, quality, internal_resolution)
+    except Exception as e:
+        print(f"Error rendering 3MF {job['model_path']}: {e}")
+        return {'status': 'error', 'views': {}, 'error': str(e)}
+    
+    status = 'ok' if print_summary(results, views) else 'failed'
+    return {'status': status, 'views': results}
+
+
+def _reserve_stdout():
+    """
+    Move file descriptor 1 to stderr and return a file on the original stdout.
+
+    Everything printed afterwards by Python, Blender, Cycles or the per-GPU
+    workers goes to stderr, leaving the returned file as the only writer of
+    the real stdout.
+    """
+    sys.stdout.flush()
+    reserved = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    return reserved
+
+
+def run_serve(views, device_type, resolution, split_gpus=False, quality='preview',
+              internal_resolution=None, results_out=None):
+    """
+    Serve JSON-lines render jobs from stdin until EOF.
+
+    Like batch mode, but every job gets a machine-readable result line, so
+    a long-lived Blender process can sit behind a job queue. Result lines go
+    to results_out (from _reserve_stdout(), which main() calls before GPU
+    detection prints anything).
+    """
+    if results_out is None:
+        results_out = _reserve_stdout()
+    
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            job = json.loads(line)
+        except ValueError as e:
+            result = {'status': 'error', 'views': {}, 'error': f"Invalid JSON job: {e}"}
+        else:
+            result = main_for_job(job, views, device_type, resolution, split_gpus, quality,
+                                  internal_resolution)
+        sys.stdout.flush()
+        print(json.dumps(result), file=results_out, flush=True)
+
+
+def main():
+    """Main entry point."""
+    remove_stale_scratch()
+    
+    # Parse arguments after '--'
+    argv = sys.argv
+    if '--' in argv:
+        argv = argv[argv.index('--') + 1:]
+    else:
+        print(USAGE)
+        sys.exit(1)
+    
+    args, options = parse_options(argv)
+    batch = 'batch' in options
+    serve = 'serve' in options
+    # Keep stdout for result lines before GPU detection and probing print
+    results_out = _reserve_stdout() if serve else None
+    # Opt-in: each split saves a .blend and starts a Blender per GPU, which
+    # costs more than a handful of in-process low-res preview renders
+    split_gpus = 'split-per-gpu' in options or os.environ.get('RENDER_SPLIT_GPUS') == '1'
+    # RENDER_MODE=preview|high sets the same thing for callers that can only pass env vars
+    quality = options.get('quality') or os.environ.get('RENDER_MODE', 'preview')
+    if quality not in QUALITY_LEVELS:
+        print(f"Error: Unknown quality '{quality}', expected one of: {', '.join(QUALITY_LEVELS)}")
+        sys.exit(1)
+    
+    # Worker spawned by --split-per-gpu: the scene is already loaded
+    if 'render-only' in options:
+        if not args:
+            print("Error: --render-only requires an output directory")
+            sys.exit(1)
+        views = parse_views(args[1:])
+        if print_summary(render_saved_scene(args[0], views), views) == 0:
+            sys.exit(1)
+        return
+    
+    if batch or serve:
+        views = parse_views(args)
+    elif len(args) < 2:
+        print("Error: Missing required arguments")
+        print(USAGE)
+        sys.exit(1)
+    else:
+        input_file = args[0]
+        output_dir = args[1]
+        views = parse_views(args[2:])
+    
+    # Nothing here is ever undone; don't pay for undo steps
+    bpy.context.preferences.edit.use_global_undo = False
+    
+    # Clear the startup scene (default cube, camera, light)
+    clear_scene()
+
+    # Detect and configure GPU once for every model rendered by this process
+    if render_engine() == 'EEVEE':
+        # EEVEE renders through Blender's GPU context; Cycles devices don't apply
+        device_type = 'CPU'
+    else:
+        print("\n=== GPU Detection ===")
+        device_type = detect_gpu_backend()
+        pin_kernel_caches()
+        configure_gpu_device(device_type)
+        if device_type != 'CPU' and not _probe_render(device_type):
+            print(f"[GPU] {device_type} cannot render, falling back to CPU")
+            device_type = 'CPU'
+            os.environ[GPU_BACKEND_ENV] = device_type
+            # Spare the next few renders the failing GPU init, but retry later
+            _write_gpu_backend_cache(_gpu_cache_key(), device_type, ttl=GPU_FALLBACK_CACHE_TTL)
+        print("====================\n")
+    
+    # Get output resolution from env or default to 500. Path tracing cost is
+    # linear in pixels, so render smaller and let the PNG writer upscale.
+    resolution = int(os.environ.get('RENDER_OUTPUT_RES') or os.environ.get('RENDER_RESOLUTION', '500'))
+    internal_resolution = int(os.environ.get('RENDER_INTERNAL_RES', '256'))
+    
+    if serve:
+        run_serve(views, device_type, resolution, split_gpus, quality, internal_resolution,
+                  results_out)
+        return
+    
+    if batch:
+        failures = run_batch(views, device_type, resolution, split_gpus, quality, internal_resolution)
+        if failures:
+            print(f"\nBatch finished with {failures} failed model(s)")
+            sys.exit(1)
+        return
+    
+    try:
+        results = render_model(input_file, output_dir, views, device_type, resolution,
+                               split_gpus, quality, internal_resolution)
+    except Exception as e:
+        print(f"Error rendering 3MF: {e}")
+        sys.exit(1)
+    
+    # Exit with success if at least one view rendered
+    if print_summary(results, views) == 0:
         sys.exit(1)
 
 
 if __name__ == '__main__':
     main()
-
-
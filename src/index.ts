@@ -184,8 +184,9 @@ async function renderWithBlender(
       env: {
         ...process.env,
         LIBGL_ALWAYS_SOFTWARE: '1',
-        RENDER_RESOLUTION: process.env.RENDER_RESOLUTION || '500',
-        RENDER_SAMPLES: process.env.RENDER_SAMPLES || '128'
+        // RENDER_SAMPLES is passed through only when set, so the script can
+        // pick per-device defaults
+        RENDER_RESOLUTION: process.env.RENDER_RESOLUTION || '500'
       }
     });
 